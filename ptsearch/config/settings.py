@@ -5,7 +5,7 @@ Centralizes configuration with environment variable support and validation.
 
 import os
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, get_type_hints
 
 @dataclass
 class Settings:
@@ -15,6 +15,8 @@ class Settings:
     openai_api_key: str = ""
     embedding_model: str = "text-embedding-3-large"
     embedding_dimensions: int = 3072
+    embedding_concurrency: int = 8
+    embedding_max_retries: int = 5
     
     # Document processing
     chunk_size: int = 1000
@@ -22,42 +24,64 @@ class Settings:
     
     # Search configuration
     max_results: int = 5
+    rank_candidates: int = 2  # database hits fetched per requested result, re-ranked down to max
+    search_cache_size: int = 256
+    debug_timings: bool = False  # include per-stage timing in search metadata
     
     # Database configuration
     db_dir: str = "./data/chroma_db"
     collection_name: str = "pytorch_docs"
+    vector_backend: str = "chroma"  # chroma or faiss
+    faiss_nlist: int = 100
+    faiss_nprobe: int = 10
     
     # Cache configuration
     cache_dir: str = "./data/embedding_cache"
     max_cache_size_gb: float = 1.0
+    cache_dtype: str = "float16"  # float32, float16 or int8
+    memory_cache_size: int = 512
     
     # File paths
     default_chunks_path: str = "./data/chunks.json"
     default_embeddings_path: str = "./data/chunks_with_embeddings.json"
     
+    # HTTP server configuration (waitress); each open SSE stream holds a thread,
+    # so streams are capped below the thread count to keep workers for calls
+    server_threads: int = 64
+    server_connection_limit: int = 1024
+    server_max_streams: int = 48
+    
     # MCP Configuration
     tool_name: str = "search_pytorch_docs"
     tool_description: str = ("Search PyTorch documentation or examples. Call when the user asks "
                              "about a PyTorch API, error message, best-practice or needs a code snippet.")
     
     def __post_init__(self):
-        """Load settings from environment variables."""
+        """Load settings from environment variables, coerced to each field's type.
+        
+        >>> from unittest import mock
+        >>> env = {"PTSEARCH_MAX_RESULTS": "7", "PTSEARCH_DEBUG_TIMINGS": "yes",
+        ...        "PTSEARCH_MAX_CACHE_SIZE_GB": "0.5"}
+        >>> with mock.patch.dict(os.environ, env):
+        ...     s = Settings()
+        >>> (s.max_results, s.debug_timings, s.max_cache_size_gb)
+        (7, True, 0.5)
+        """
         # Load all settings from environment variables
-        for field_name in self.__dataclass_fields__:
-            env_name = f"PTSEARCH_{field_name.upper()}"
-            env_value = os.environ.get(env_name)
+        for field_name, field_type in _FIELD_TYPES.items():
+            env_value = os.environ.get(f"PTSEARCH_{field_name.upper()}")
+            if env_value is None:
+                continue
             
-            if env_value is not None:
-                field_type = self.__dataclass_fields__[field_name].type
-                # Convert the string to the appropriate type
-                if field_type == int:
-                    setattr(self, field_name, int(env_value))
-                elif field_type == float:
-                    setattr(self, field_name, float(env_value))
-                elif field_type == bool:
-                    setattr(self, field_name, env_value.lower() in ('true', 'yes', '1'))
-                else:
-                    setattr(self, field_name, env_value)
+            # Convert the string to the appropriate type
+            if field_type is int:
+                setattr(self, field_name, int(env_value))
+            elif field_type is float:
+                setattr(self, field_name, float(env_value))
+            elif field_type is bool:
+                setattr(self, field_name, env_value.lower() in ('true', 'yes', '1'))
+            else:
+                setattr(self, field_name, env_value)
         
         # Special case for OPENAI_API_KEY which has a different env var name
         if not self.openai_api_key:
@@ -78,8 +102,13 @@ class Settings:
             errors["overlap_size"] = "Overlap size cannot be negative"
         if self.max_results <= 0:
             errors["max_results"] = "Max results must be positive"
+        if not 0 < self.server_max_streams < self.server_threads:
+            errors["server_max_streams"] = "Max streams must be positive and below the server thread count"
         
         return errors
 
+# Field types resolved once at import rather than on every instantiation
+_FIELD_TYPES = get_type_hints(Settings)
+
 # Singleton instance of settings
 settings = Settings()
\ No newline at end of file
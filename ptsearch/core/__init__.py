@@ -5,9 +5,10 @@ Core functionality for PyTorch Documentation Search Tool.
 # Import compatibility patches first
 from ptsearch.utils.compat import *
 
-from ptsearch.core.database import DatabaseManager
+from ptsearch.core.cache import BinaryEmbeddingCache
+from ptsearch.core.database import DatabaseManager, open_database
 from ptsearch.core.embedding import EmbeddingGenerator
-from ptsearch.core.search import SearchEngine
-from ptsearch.core.formatter import ResultFormatter
+from ptsearch.core.search import SearchEngine, get_engine, close_engine
+from ptsearch.core.formatter import ResultFormatter, SearchHit
 
-__all__ = ["DatabaseManager", "EmbeddingGenerator", "SearchEngine", "ResultFormatter"]
\ No newline at end of file
+__all__ = ["BinaryEmbeddingCache", "DatabaseManager", "open_database", "EmbeddingGenerator", "SearchEngine", "get_engine", "close_engine", "ResultFormatter", "SearchHit"]
\ No newline at end of file
@@ -0,0 +1,419 @@
+"""
+Embedding cache module for PyTorch Documentation Search Tool.
+Stores embedding vectors in a single memory-mapped binary file indexed by SQLite.
+"""
+
+import glob
+import mmap
+import string
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ptsearch.utils import logger, serialization
+
+_HEX_DIGITS = frozenset(string.hexdigits.lower())
+
+class BinaryEmbeddingCache:
+    """Append-only binary vector store with a SQLite key index and LRU eviction.
+
+    Vectors are appended to ``vectors-<generation>.bin`` and read back through
+    ``mmap``; ``index.sqlite`` maps each cache key to the vector's offset and
+    dimension. Replaced and evicted vectors leave holes in the vector file,
+    which is rewritten once the wasted fraction exceeds ``compact_threshold``.
+
+    Vectors are stored as ``float32``, ``float16`` or ``int8`` (with a
+    per-vector scale) and always returned as ``float32``.
+    """
+
+    INDEX_FILE = "index.sqlite"
+    FORMAT_VERSION = "3"
+    INDEX_MMAP_BYTES = 256 * 1024 * 1024
+    DTYPES = ("float32", "float16", "int8")
+    # Keys per lookup query, below SQLite's default bound-parameter limit
+    QUERY_KEYS_MAX = 500
+    # Fields written by the per-file JSON cache this format replaced
+    LEGACY_ENTRY_FIELDS = frozenset(("text_preview", "model", "embedding", "timestamp"))
+
+    def __init__(self, cache_dir: str, max_size_bytes: int, dtype: str = "float16",
+                 compact_threshold: float = 0.3):
+        """Open (or create) the cache stored in ``cache_dir``."""
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported cache dtype {dtype!r}, expected one of {self.DTYPES}")
+
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.compact_threshold = compact_threshold
+        self.dtype = np.dtype(dtype)
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._generation = 0
+        self._live_bytes = 0
+        # Access times are buffered and written with the next write transaction
+        # so that cache hits stay read-only in SQLite
+        self._touched: Dict[bytes, float] = {}
+
+        self.open()
+
+    @property
+    def vector_path(self) -> str:
+        """Path of the vector file for the current generation."""
+        return os.path.join(self.cache_dir, f"vectors-{self._generation}.bin")
+
+    def open(self) -> None:
+        """Open the index and map the vector file."""
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, self.INDEX_FILE),
+                                         check_same_thread=False)
+            # Serve index lookups from a memory-mapped B-tree and keep commits cheap
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA mmap_size={self.INDEX_MMAP_BYTES}")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                )
+            created = self._check_format()
+            with self._conn:
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+                )
+            self._remove_stale_files()
+            if created:
+                self._remove_legacy_entries()
+            self._file = open(self.vector_path, "a+b")
+            self._remap()
+            self._drop_truncated_entries()
+            self._live_bytes = self._count_live_bytes()
+
+    def close(self) -> None:
+        """Persist buffered access times and release file handles."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touched()
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._conn.close()
+            self._conn = None
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Return a copy of the cached vector for ``key`` or None on a miss."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Return copies of the cached vectors for ``keys``, None for each miss."""
+        with self._lock:
+            rows = {}
+            for start in range(0, len(keys), self.QUERY_KEYS_MAX):
+                chunk = keys[start:start + self.QUERY_KEYS_MAX]
+                rows.update(
+                    (row[0], row[1:]) for row in self._conn.execute(
+                        "SELECT key, offset, dim, scale FROM entries WHERE key IN (%s)"
+                        % ",".join("?" * len(chunk)), chunk
+                    )
+                )
+            if not rows:
+                return [None] * len(keys)
+
+            end = max(offset + dim * self.dtype.itemsize for offset, dim, _ in rows.values())
+            if self._mm is None or end > len(self._mm):
+                self._remap()
+                if self._mm is None:
+                    return [None] * len(keys)
+
+            # Ask the kernel to read every hit's pages ahead of the copies below
+            if len(rows) > 1:
+                self._prefetch(rows.values())
+
+            vectors = []
+            now = time.time()
+            for key in keys:
+                row = rows.get(key)
+                vector = self._read(*row) if row is not None else None
+                if vector is not None:
+                    self._touched[key] = now
+                vectors.append(vector)
+            return vectors
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        """Store a single vector under ``key``."""
+        self.put_many([(key, vector)])
+
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]) -> None:
+        """Append vectors to the vector file and index them in one transaction."""
+        with self._lock:
+            rows = []
+            added_bytes = 0
+            now = time.time()
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            for key, vector in items:
+                data, scale = self._quantize(vector)
+                self._file.write(data.tobytes())
+                rows.append((key, offset, int(data.size), scale, now))
+                offset += data.nbytes
+                added_bytes += data.nbytes
+                self._touched.pop(key, None)
+
+            if not rows:
+                return
+
+            # Replaced entries no longer count towards the live size
+            replaced_dims = 0
+            for start in range(0, len(rows), self.QUERY_KEYS_MAX):
+                chunk = [row[0] for row in rows[start:start + self.QUERY_KEYS_MAX]]
+                replaced_dims += sum(
+                    row[0] for row in self._conn.execute(
+                        "SELECT dim FROM entries WHERE key IN (%s)" % ",".join("?" * len(chunk)),
+                        chunk
+                    )
+                )
+
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, offset, dim, scale, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._write_touched()
+            self._live_bytes += added_bytes - replaced_dims * self.dtype.itemsize
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits its size limit."""
+        with self._lock:
+            if self._live_bytes > self.max_size_bytes:
+                with self._conn:
+                    self._write_touched()
+
+                bytes_to_remove = self._live_bytes - self.max_size_bytes
+                bytes_removed = 0
+                removed = []
+
+                # Walk the last_access index oldest first and stop as soon as
+                # enough space is freed, rather than sorting every entry
+                cursor = self._conn.execute("SELECT key, dim FROM entries ORDER BY last_access")
+                for key, dim in cursor:
+                    removed.append((key,))
+                    bytes_removed += dim * self.dtype.itemsize
+                    if bytes_removed >= bytes_to_remove:
+                        break
+                cursor.close()
+
+                with self._conn:
+                    self._conn.executemany("DELETE FROM entries WHERE key = ?", removed)
+                self._live_bytes -= bytes_removed
+
+                logger.info(f"Cache cleanup completed",
+                           entries_removed=len(removed),
+                           mb_removed=f"{bytes_removed / 1024 / 1024:.2f}")
+
+            file_size = self._file_size()
+            if file_size and (file_size - self._live_bytes) / file_size > self.compact_threshold:
+                self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the vector file without holes left by replaced or evicted entries."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, offset, dim FROM entries ORDER BY offset"
+            ).fetchall()
+
+            # Appends since the last read are not visible through the old mapping
+            if self._mm is None or len(self._mm) < self._file_size():
+                self._remap()
+
+            old_path = self.vector_path
+            new_generation = self._generation + 1
+            new_path = os.path.join(self.cache_dir, f"vectors-{new_generation}.bin")
+
+            updates = []
+            new_offset = 0
+            with open(new_path, "wb") as f:
+                for key, offset, dim in rows:
+                    nbytes = dim * self.dtype.itemsize
+                    f.write(self._mm[offset:offset + nbytes])
+                    updates.append((new_offset, key))
+                    new_offset += nbytes
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Offsets and the generation switch commit together, so a crash
+            # leaves either the old or the new file fully indexed
+            with self._conn:
+                self._conn.executemany("UPDATE entries SET offset = ? WHERE key = ?", updates)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)",
+                    (str(new_generation),)
+                )
+
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            self._file.close()
+            self._generation = new_generation
+            self._file = open(self.vector_path, "a+b")
+            self._remap()
+            os.remove(old_path)
+
+            logger.info(f"Cache compacted", entries=len(rows), bytes=new_offset)
+
+    def __len__(self) -> int:
+        """Number of cached vectors."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _quantize(self, vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Convert a vector to the storage dtype, returning it with its scale."""
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.dtype.kind != "i":
+            return np.ascontiguousarray(vector, dtype=self.dtype), 1.0
+
+        # Symmetric per-vector int8 quantization
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        return np.round(vector / scale).astype(np.int8), scale
+
+    def _check_format(self) -> bool:
+        """Reset the cache if it was written with a different format; True if the index is new."""
+        meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        expected = {"version": self.FORMAT_VERSION, "dtype": self.dtype.name}
+
+        if meta and all(meta.get(name) == value for name, value in expected.items()):
+            self._generation = int(meta.get("generation", 0))
+            return False
+
+        if meta:
+            logger.warning(f"Embedding cache format changed, resetting cache", path=self.cache_dir)
+        with self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS entries")
+            self._conn.execute(
+                "CREATE TABLE entries ("
+                "key BLOB PRIMARY KEY, offset INTEGER NOT NULL, dim INTEGER NOT NULL, "
+                "scale REAL NOT NULL, last_access REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._conn.execute("DELETE FROM meta")
+            self._conn.executemany(
+                "INSERT INTO meta (name, value) VALUES (?, ?)",
+                [*expected.items(), ("generation", "0")]
+            )
+        self._generation = 0
+        if os.path.exists(self.vector_path):
+            os.remove(self.vector_path)
+        return not meta
+
+    def _remove_stale_files(self) -> None:
+        """Remove vector files from other generations (e.g. interrupted compactions)."""
+        for path in glob.glob(os.path.join(self.cache_dir, "vectors-*.bin")):
+            if path != self.vector_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _remove_legacy_entries(self) -> None:
+        """Remove per-entry ``<sha256>.json`` files left by the old cache layout.
+
+        Runs only when the index is first created, and only deletes files
+        whose name is a SHA-256 digest and whose content has the old entry fields.
+        """
+        removed = 0
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if (ext == ".json" and len(name) == 64 and set(name) <= _HEX_DIGITS
+                        and entry.is_file() and self._is_legacy_entry(entry.path)):
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except OSError:
+                        pass
+
+        if removed:
+            logger.info(f"Removed legacy cache files", count=removed, path=self.cache_dir)
+
+    @classmethod
+    def _is_legacy_entry(cls, path: str) -> bool:
+        """Whether a file holds an entry written by the old per-file cache."""
+        try:
+            with open(path, "rb") as f:
+                data = serialization.loads(f.read())
+        except (OSError, ValueError):
+            return False
+        return isinstance(data, dict) and cls.LEGACY_ENTRY_FIELDS <= data.keys()
+
+    def _drop_truncated_entries(self) -> None:
+        """Drop index rows pointing past the end of the vector file."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM entries WHERE offset + dim * ? > ?",
+                (self.dtype.itemsize, self._file_size())
+            )
+
+    def _remap(self) -> None:
+        """(Re)map the vector file after it has grown."""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file_size() > 0:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, offset: int, dim: int, scale: float) -> Optional[np.ndarray]:
+        """Dequantize one vector out of the mapping."""
+        if offset + dim * self.dtype.itemsize > len(self._mm):
+            return None
+
+        # Dequantizing copies out of the mapping, so callers never hold a
+        # view into a file that may be remapped or compacted later
+        stored = np.frombuffer(self._mm, dtype=self.dtype, count=dim, offset=offset)
+        vector = stored.astype(np.float32)
+        if self.dtype.kind == "i":
+            vector *= scale
+        return vector
+
+    def _prefetch(self, rows: Iterable[Tuple[int, int, float]]) -> None:
+        """Advise the kernel that the pages holding ``rows`` will be read soon."""
+        if not hasattr(mmap, "MADV_WILLNEED"):
+            return
+        for offset, dim, _ in rows:
+            start = offset - offset % mmap.PAGESIZE
+            end = min(offset + dim * self.dtype.itemsize, len(self._mm))
+            if end > start:
+                self._mm.madvise(mmap.MADV_WILLNEED, start, end - start)
+
+    def _file_size(self) -> int:
+        """Current size of the vector file in bytes."""
+        return os.fstat(self._file.fileno()).st_size
+
+    def _count_live_bytes(self) -> int:
+        """Bytes occupied by indexed vectors."""
+        dims = self._conn.execute("SELECT COALESCE(SUM(dim), 0) FROM entries").fetchone()[0]
+        return dims * self.dtype.itemsize
+
+    def _write_touched(self) -> None:
+        """Write buffered access times; must run inside a transaction."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _flush_touched(self) -> None:
+        """Write buffered access times in their own transaction."""
+        with self._conn:
+            self._write_touched()
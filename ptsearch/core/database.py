@@ -4,23 +4,60 @@ Handles storage and retrieval of chunks in ChromaDB.
 """
 
 import os
-import json
 from typing import List, Dict, Any, Optional
 
 import chromadb
+import ijson
+import numpy as np
 
 from ptsearch.utils import logger
+from ptsearch.utils.compat import CHROMA_ACCEPTS_NDARRAY, batched
 from ptsearch.utils.error import DatabaseError
 from ptsearch.config import settings
 
+# Numba is optional; without it the kernel below runs as plain NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _fit_vector(src: np.ndarray, out: np.ndarray) -> None:
+    """Copy ``src`` into ``out``, truncating or zero-padding to the length of ``out``."""
+    n = min(src.size, out.size)
+    out[:n] = src[:n]
+    out[n:] = 0.0
+
+
+if njit is not None:
+    _fit_vector = njit(cache=True)(_fit_vector)
+
+
+def open_database(db_dir: str = settings.db_dir,
+                  collection_name: str = settings.collection_name) -> "DatabaseManager":
+    """Open the vector store selected by ``settings.vector_backend``."""
+    if settings.vector_backend == "faiss":
+        from ptsearch.core.faiss_backend import FaissBackend
+        return FaissBackend(db_dir, collection_name)
+    return DatabaseManager(db_dir, collection_name)
+
+
 class DatabaseManager:
     """Manages storage and retrieval of document chunks in ChromaDB."""
     
+    # query() returns nested per-query lists regardless of the Chroma version
+    result_shape = "nested"
+    
     def __init__(self, db_dir: str = settings.db_dir, collection_name: str = settings.collection_name):
         """Initialize database manager for ChromaDB."""
         self.db_dir = db_dir
         self.collection_name = collection_name
-        self.collection = None
+        # Bumped whenever the stored chunks change, invalidating cached searches
+        self.version = 0
+        
+        # Shared read-only vector for empty or invalid embeddings
+        self._zero = np.zeros(settings.embedding_dimensions, dtype=np.float32)
+        self._zero.setflags(write=False)
         
         # Create directory if it doesn't exist
         os.makedirs(db_dir, exist_ok=True)
@@ -33,6 +70,14 @@ class DatabaseManager:
             error_msg = f"Error initializing ChromaDB client: {e}"
             logger.error(error_msg)
             raise DatabaseError(error_msg)
+        
+        # Open the collection up front so queries use it directly
+        try:
+            self._collection = self._open_collection()
+        except Exception as e:
+            error_msg = f"Error opening ChromaDB collection: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg, details={"collection": collection_name})
     
     def reset_collection(self) -> None:
         """Delete and recreate the collection with standard settings."""
@@ -44,57 +89,59 @@ class DatabaseManager:
             logger.info(f"No existing collection to delete", error=str(e))
         
         # Create a new collection with standard settings
-        self.collection = self.client.create_collection(
+        self._collection = self.client.create_collection(
             name=self.collection_name,
             metadata={"hnsw:space": "cosine"}
         )
+        self.version += 1
         logger.info(f"Created new collection", collection=self.collection_name)
     
     def get_collection(self):
+        """Get the collection."""
+        return self._collection
+    
+    def _open_collection(self):
         """Get or create the collection."""
-        if self.collection is not None:
-            return self.collection
-            
         try:
-            self.collection = self.client.get_collection(name=self.collection_name)
+            collection = self.client.get_collection(name=self.collection_name)
             logger.info(f"Retrieved existing collection", collection=self.collection_name)
         except Exception as e:
             # Collection doesn't exist, create it
             logger.info(f"Creating new collection", error=str(e))
-            self.collection = self.client.create_collection(
+            collection = self.client.create_collection(
                 name=self.collection_name,
                 metadata={"hnsw:space": "cosine"}
             )
             logger.info(f"Created new collection", collection=self.collection_name)
         
-        return self.collection
+        return collection
     
-    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 50) -> None:
-        """Add chunks to the collection with batching."""
-        collection = self.get_collection()
-        
-        # Prepare data for ChromaDB
-        ids = [str(chunk.get("id", idx)) for idx, chunk in enumerate(chunks)]
-        embeddings = [self._ensure_vector_format(chunk.get("embedding")) for chunk in chunks]
-        documents = [chunk.get("text", "") for chunk in chunks]
-        metadatas = [chunk.get("metadata", {}) for chunk in chunks]
+    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 50, id_offset: int = 0) -> None:
+        """Add chunks to the collection, preparing one batch at a time."""
+        collection = self._collection
         
-        # Add data in batches
         total_batches = (len(chunks) - 1) // batch_size + 1
         logger.info(f"Adding chunks in batches", count=len(chunks), batches=total_batches)
         
         for i in range(0, len(chunks), batch_size):
-            end_idx = min(i + batch_size, len(chunks))
+            batch = chunks[i:i + batch_size]
             batch_num = i // batch_size + 1
             
+            # Prepare data for ChromaDB; embeddings stay a (batch, dim) float32 matrix
+            ids = [str(chunk.get("id", id_offset + i + j)) for j, chunk in enumerate(batch)]
+            embeddings = self._ensure_matrix_format([chunk.get("embedding") for chunk in batch])
+            documents = [chunk.get("text", "") for chunk in batch]
+            metadatas = [chunk.get("metadata", {}) for chunk in batch]
+            
             try:
                 collection.add(
-                    ids=ids[i:end_idx],
-                    embeddings=embeddings[i:end_idx],
-                    documents=documents[i:end_idx],
-                    metadatas=metadatas[i:end_idx]
+                    ids=ids,
+                    embeddings=embeddings if CHROMA_ACCEPTS_NDARRAY else embeddings.tolist(),
+                    documents=documents,
+                    metadatas=metadatas
                 )
-                logger.info(f"Added batch", batch=batch_num, total=total_batches, chunks=end_idx-i)
+                self.version += 1
+                logger.info(f"Added batch", batch=batch_num, total=total_batches, chunks=len(batch))
                 
             except Exception as e:
                 error_msg = f"Error adding batch {batch_num}: {e}"
@@ -102,20 +149,23 @@ class DatabaseManager:
                 raise DatabaseError(error_msg, details={
                     "batch": batch_num,
                     "total_batches": total_batches,
-                    "batch_size": end_idx - i
+                    "batch_size": len(batch)
                 })
     
     def query(self, query_embedding: List[float], n_results: int = 5, 
               filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Query the collection with vector search."""
-        collection = self.get_collection()
-        
-        # Ensure query embedding has the correct format
-        query_embedding = self._ensure_vector_format(query_embedding)
+        return self.query_many([query_embedding], n_results, filters)[0]
+    
+    def query_many(self, query_embeddings: List[Any], n_results: int = 5,
+                   filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Query the collection with several embeddings in one request, one result set each."""
+        # Ensure query embeddings have the correct format
+        embeddings = self._ensure_matrix_format(list(query_embeddings))
         
         # Prepare query parameters
         query_params = {
-            "query_embeddings": [query_embedding],
+            "query_embeddings": embeddings if CHROMA_ACCEPTS_NDARRAY else embeddings.tolist(),
             "n_results": n_results,
             "include": ["documents", "metadatas", "distances"]
         }
@@ -126,19 +176,28 @@ class DatabaseManager:
         
         # Execute query
         try:
-            results = collection.query(**query_params)
+            results = self._collection.query(**query_params)
             
-            # Format results for consistency
-            formatted_results = {
-                "ids": results.get("ids", [[]]),
-                "documents": results.get("documents", [[]]),
-                "metadatas": results.get("metadatas", [[]]),
-                "distances": results.get("distances", [[]])
-            }
+            # Split into one result set per query, formatted for consistency
+            count = len(embeddings)
+            formatted_results = [
+                {
+                    "ids": [ids],
+                    "documents": [documents],
+                    "metadatas": [metadatas],
+                    "distances": [distances]
+                }
+                for ids, documents, metadatas, distances in zip(
+                    results.get("ids") or [[]] * count,
+                    results.get("documents") or [[]] * count,
+                    results.get("metadatas") or [[]] * count,
+                    results.get("distances") or [[]] * count
+                )
+            ]
             
             # Log query info
-            if formatted_results["ids"] and formatted_results["ids"][0]:
-                logger.info(f"Query completed", results_count=len(formatted_results["ids"][0]))
+            logger.info(f"Query completed", queries=count,
+                        results_count=sum(len(result["ids"][0]) for result in formatted_results))
             
             return formatted_results
         except Exception as e:
@@ -147,24 +206,29 @@ class DatabaseManager:
             raise DatabaseError(error_msg)
     
     def load_from_file(self, filepath: str, reset: bool = True, batch_size: int = 50) -> None:
-        """Load chunks from a file into ChromaDB."""
+        """Load chunks from a file into ChromaDB, streaming one batch at a time."""
         logger.info(f"Loading chunks from file", path=filepath)
         
-        # Load the chunks
+        # Stream the chunks so memory stays bounded by the batch size
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                chunks = json.load(f)
-            
-            logger.info(f"Loaded chunks from file", count=len(chunks))
+            # Check the whole file first, so a truncated or malformed file
+            # leaves the existing collection untouched
+            with open(filepath, 'rb') as f:
+                for item in ijson.items(f, 'item', use_float=True):
+                    if not isinstance(item, dict):
+                        raise ValueError(f"expected a list of chunk objects, found {type(item).__name__}")
             
-            # Reset collection if requested
-            if reset:
-                self.reset_collection()
-            
-            # Add chunks to collection
-            self.add_chunks(chunks, batch_size)
+            with open(filepath, 'rb') as f:
+                # Reset collection if requested
+                if reset:
+                    self.reset_collection()
+                
+                count = 0
+                for batch in batched(ijson.items(f, 'item', use_float=True), batch_size):
+                    self.add_chunks(list(batch), batch_size, id_offset=count)
+                    count += len(batch)
             
-            logger.info(f"Successfully loaded chunks into ChromaDB", count=len(chunks))
+            logger.info(f"Successfully loaded chunks into ChromaDB", count=count)
         except Exception as e:
             error_msg = f"Error loading from file: {e}"
             logger.error(error_msg)
@@ -172,11 +236,9 @@ class DatabaseManager:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the collection."""
-        collection = self.get_collection()
-        
         try:
             # Get count
-            count = collection.count()
+            count = self._collection.count()
             
             return {
                 "total_chunks": count,
@@ -188,35 +250,59 @@ class DatabaseManager:
             logger.error(error_msg)
             raise DatabaseError(error_msg)
     
-    def _ensure_vector_format(self, embedding: Any) -> List[float]:
-        """Ensure vector is in the correct format for ChromaDB."""
-        # Handle empty or None embeddings
-        if not embedding:
-            return [0.0] * settings.embedding_dimensions
+    def _ensure_matrix_format(self, embeddings: List[Any]) -> np.ndarray:
+        """Fit embeddings into a preallocated (count, embedding_dimensions) float32 matrix."""
+        matrix = np.empty((len(embeddings), settings.embedding_dimensions), dtype=np.float32)
+        for row, embedding in zip(matrix, embeddings):
+            vector = self._coerce_vector(embedding)
+            if vector is None:
+                row[:] = 0.0
+            else:
+                _fit_vector(vector, row)
+        return matrix
+    
+    def _to_vector(self, embedding: Any) -> np.ndarray:
+        """Convert an embedding to a float32 array of the configured dimensions."""
+        vector = self._coerce_vector(embedding)
+        if vector is None:
+            return self._zero
+        if vector.size == settings.embedding_dimensions:
+            return vector
+        
+        fitted = np.empty(settings.embedding_dimensions, dtype=np.float32)
+        _fit_vector(vector, fitted)
+        return fitted
+    
+    def _coerce_vector(self, embedding: Any) -> Optional[np.ndarray]:
+        """Convert an embedding to a 1-D float32 array, or None if it is empty or invalid."""
+        dimensions = settings.embedding_dimensions
         
-        # Handle NumPy arrays
-        if hasattr(embedding, "tolist"):
-            embedding = embedding.tolist()
+        if embedding is None:
+            return None
         
-        # Ensure all values are Python floats
+        # Convert lists and arrays of any numeric dtype in one C-level pass;
+        # scalars and other non-vector values are logged and replaced with zeros
         try:
-            embedding = [float(x) for x in embedding]
+            vector = np.asarray(embedding, dtype=np.float32)
+            if vector.ndim != 1:
+                raise ValueError(f"expected a 1-D vector, got shape {vector.shape}")
+            vector = np.ascontiguousarray(vector)
         except Exception as e:
             logger.error(f"Error converting embedding values to float", error=str(e))
-            return [0.0] * settings.embedding_dimensions
-        
-        # Verify dimensions
-        if len(embedding) != settings.embedding_dimensions:
-            # Pad or truncate if necessary
-            if len(embedding) < settings.embedding_dimensions:
-                logger.warning(f"Padding embedding dimensions", 
-                              from_dim=len(embedding), 
-                              to_dim=settings.embedding_dimensions)
-                embedding.extend([0.0] * (settings.embedding_dimensions - len(embedding)))
-            else:
-                logger.warning(f"Truncating embedding dimensions", 
-                              from_dim=len(embedding), 
-                              to_dim=settings.embedding_dimensions)
-                embedding = embedding[:settings.embedding_dimensions]
+            return None
+        
+        # Handle empty embeddings
+        if vector.size == 0:
+            return None
+        
+        # Verify dimensions; callers pad or truncate
+        if vector.size < dimensions:
+            logger.warning(f"Padding embedding dimensions", 
+                          from_dim=vector.size, 
+                          to_dim=dimensions)
+        elif vector.size > dimensions:
+            logger.warning(f"Truncating embedding dimensions", 
+                          from_dim=vector.size, 
+                          to_dim=dimensions)
         
-        return embedding
\ No newline at end of file
+        return vector
\ No newline at end of file
@@ -3,17 +3,153 @@ Embedding generation module for PyTorch Documentation Search Tool.
 Handles generating embeddings with OpenAI API and basic caching.
 """
 
-import os
-import json
-import hashlib
-import time
+import asyncio
+import random
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 
-from openai import OpenAI
+import ijson
+import numpy as np
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 
-from ptsearch.utils import logger
+from ptsearch.utils import logger, serialization
 from ptsearch.utils.error import APIError, ConfigError
 from ptsearch.config import settings
+from ptsearch.utils.compat import batched
+from ptsearch.core.cache import BinaryEmbeddingCache
+
+# BLAKE3 hashes several times faster than SHA-256 via SIMD; fall back when not installed
+try:
+    from blake3 import blake3 as _cache_hash
+except ImportError:
+    from hashlib import sha256 as _cache_hash
+
+# 128-bit keys are ample for collision resistance in a local cache
+CACHE_KEY_BYTES = 16
+
+
+class _CacheWriter:
+    """Buffers cache writes and stores them in batches on a background thread.
+    
+    Holds no reference to its EmbeddingGenerator, so the generator's finalizer
+    can flush and close it without keeping the generator alive.
+    """
+    
+    # Buffered cache writes are flushed once this many are pending, or once the
+    # oldest has waited this many seconds, so sparse single queries still persist
+    PENDING_WRITES_MAX = 256
+    PENDING_WRITES_MAX_AGE = 2.0
+    # Flushes queued on the background writer before flush blocks
+    WRITES_IN_FLIGHT_MAX = 4
+    
+    def __init__(self, cache: BinaryEmbeddingCache):
+        """Initialize the writer for an open cache."""
+        self.cache = cache
+        self._executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ptsearch-cache-writer"
+        )
+        
+        # Entries stay visible in _writing until the writer thread has stored them
+        self._pending: Dict[bytes, np.ndarray] = {}
+        self._writing: Dict[bytes, np.ndarray] = {}
+        self._futures: List[Future] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+    
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Return an embedding that is buffered or being written, if any."""
+        with self._lock:
+            embedding = self._pending.get(key)
+            return embedding if embedding is not None else self._writing.get(key)
+    
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Return buffered or in-flight embeddings for several keys."""
+        with self._lock:
+            embeddings = [self._pending.get(key) for key in keys]
+            for j, key in enumerate(keys):
+                if embeddings[j] is None:
+                    embeddings[j] = self._writing.get(key)
+        return embeddings
+    
+    def add(self, key: bytes, embedding: np.ndarray) -> None:
+        """Buffer an embedding for the next flush."""
+        with self._lock:
+            self._pending[key] = embedding
+            flush = len(self._pending) >= self.PENDING_WRITES_MAX
+            if not flush and self._timer is None and self._executor is not None:
+                # First entry of a new batch; make sure it is written even if no more follow
+                self._timer = threading.Timer(self.PENDING_WRITES_MAX_AGE, self.flush, kwargs={"wait": False})
+                self._timer.daemon = True
+                self._timer.start()
+        
+        if flush:
+            self.flush(wait=False)
+    
+    def flush(self, wait: bool = True) -> None:
+        """Hand buffered embeddings to the writer thread, optionally waiting for it."""
+        with self._lock:
+            if self._executor is None:
+                return
+            self._cancel_timer()
+            if self._pending:
+                batch, self._pending = self._pending, {}
+                self._writing.update(batch)
+                self._futures.append(self._executor.submit(self._write, batch))
+            
+            self._futures = [future for future in self._futures if not future.done()]
+            if wait:
+                waiting = list(self._futures)
+            else:
+                # Bound the writer queue so memory held by queued batches stays limited
+                waiting = self._futures[:-self.WRITES_IN_FLIGHT_MAX]
+        
+        for future in waiting:
+            future.result()
+    
+    def close(self) -> None:
+        """Write everything still buffered and close the cache."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._cancel_timer()
+        if executor is None:
+            return
+        executor.shutdown(wait=True)
+        
+        # Write the remainder on this thread; at interpreter exit the
+        # executor no longer accepts new work
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            self._write(batch)
+        self.cache.close()
+    
+    def _cancel_timer(self) -> None:
+        """Cancel a scheduled flush; must hold the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+    
+    def _write(self, batch: Dict[bytes, np.ndarray]) -> None:
+        """Write a batch of embeddings to the cache; runs on the writer thread."""
+        try:
+            self.cache.put_many(batch.items())
+        except Exception as e:
+            logger.error(f"Error writing to cache", path=self.cache.cache_dir, error=str(e))
+        finally:
+            with self._lock:
+                for key, embedding in batch.items():
+                    if self._writing.get(key) is embedding:
+                        del self._writing[key]
+        
+        # Manage cache size (simple LRU)
+        try:
+            self.cache.evict()
+        except Exception as e:
+            logger.error(f"Error cleaning up cache", path=self.cache.cache_dir, error=str(e))
+
 
 class EmbeddingGenerator:
     """Generates embeddings using OpenAI API with caching support."""
@@ -25,7 +161,20 @@ class EmbeddingGenerator:
         self.api_key = api_key or settings.openai_api_key
         self.use_cache = use_cache
         self.cache_dir = cache_dir or settings.cache_dir
-        self.stats = {"hits": 0, "misses": 0}
+        self.cache: Optional[BinaryEmbeddingCache] = None
+        self._writer: Optional[_CacheWriter] = None
+        self.stats = {"hits": 0, "mem_hits": 0, "misses": 0}
+        
+        # Shared read-only fallback for empty texts and failed requests
+        self._zero = np.zeros(settings.embedding_dimensions, dtype=np.float32)
+        self._zero.setflags(write=False)
+        self._zero_list = self._zero.tolist()
+        
+        # In-process LRU of recent single-text embeddings, checked before the disk cache
+        self._mem_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._mem_cache_max = settings.memory_cache_size
+        # The generator may be shared by server threads
+        self._mem_lock = threading.Lock()
         
         # Validate API key early
         if not self.api_key:
@@ -38,8 +187,14 @@ class EmbeddingGenerator:
         
         # Initialize cache if enabled
         if use_cache:
-            os.makedirs(self.cache_dir, exist_ok=True)
-            logger.info(f"Embedding cache initialized", path=self.cache_dir)
+            max_size_bytes = int(settings.max_cache_size_gb * 1024 * 1024 * 1024)
+            self.cache = BinaryEmbeddingCache(self.cache_dir, max_size_bytes, settings.cache_dtype)
+            # Cache writes are buffered, then written in one transaction by a background thread
+            self._writer = _CacheWriter(self.cache)
+            # Long-running servers rarely close explicitly; write what is left once
+            # the generator is collected or at exit, without keeping it alive
+            self._finalizer = weakref.finalize(self, self._writer.close)
+            logger.info(f"Embedding cache initialized", path=self.cache_dir, entries=len(self.cache))
     
     def _initialize_client(self):
         """Initialize OpenAI client with error handling for compatibility."""
@@ -59,17 +214,41 @@ class EmbeddingGenerator:
                 logger.error(error_msg)
                 raise APIError(error_msg)
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def _create_async_client(self) -> AsyncOpenAI:
+        """Create an async OpenAI client for the current event loop."""
+        try:
+            return AsyncOpenAI(api_key=self.api_key)
+        except TypeError as e:
+            # Handle proxies parameter error
+            if "unexpected keyword argument 'proxies'" in str(e):
+                import httpx
+                http_client = httpx.AsyncClient(timeout=60.0)
+                return AsyncOpenAI(api_key=self.api_key, http_client=http_client)
+            error_msg = f"Unexpected error initializing async OpenAI client: {e}"
+            logger.error(error_msg)
+            raise APIError(error_msg)
+    
+    def generate_embedding(self, text: str) -> np.ndarray:
         """Generate embedding for a single text with caching."""
-        if not text:
+        if self._is_blank(text):
             logger.warning("Empty text provided for embedding generation")
-            return [0.0] * settings.embedding_dimensions
+            return self._zero
             
         if self.use_cache:
-            # Check cache first
-            cached_embedding = self._get_from_cache(text)
-            if cached_embedding:
+            # Check in-memory cache, then disk cache
+            with self._mem_lock:
+                embedding = self._mem_cache.get(text)
+                if embedding is not None:
+                    self._mem_cache.move_to_end(text)
+            if embedding is not None:
+                self.stats["mem_hits"] += 1
+                return embedding
+            
+            key = self._cache_key(text)
+            cached_embedding = self._get_from_cache(key)
+            if cached_embedding is not None:
                 self.stats["hits"] += 1
+                self._remember(text, cached_embedding)
                 return cached_embedding
         
         self.stats["misses"] += 1
@@ -80,91 +259,48 @@ class EmbeddingGenerator:
                 input=text,
                 model=self.model
             )
-            embedding = response.data[0].embedding
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
             
             # Cache the result
             if self.use_cache:
-                self._save_to_cache(text, embedding)
+                self._save_to_cache(key, embedding)
+                self._remember(text, embedding)
             
             return embedding
         except Exception as e:
             error_msg = f"Error generating embedding: {e}"
             logger.error(error_msg)
             # Return zeros as fallback rather than failing completely
-            return [0.0] * settings.embedding_dimensions
+            return self._zero
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 20) -> List[List[float]]:
-        """Generate embeddings for multiple texts with batching."""
+    def generate_embeddings(self, texts: List[str], batch_size: int = 20,
+                            concurrency: Optional[int] = None) -> List[np.ndarray]:
+        """Generate embeddings for multiple texts with concurrent batched API calls."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.agenerate_embeddings(texts, batch_size, concurrency))
+        
+        # Called from code already inside an event loop (an ASGI host, an MCP SDK
+        # server); asyncio.run cannot nest, so run a fresh loop on another thread
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptsearch-embed") as pool:
+            return pool.submit(
+                lambda: asyncio.run(self.agenerate_embeddings(texts, batch_size, concurrency))
+            ).result()
+    
+    async def agenerate_embeddings(self, texts: List[str], batch_size: int = 20,
+                                   concurrency: Optional[int] = None) -> List[np.ndarray]:
+        """Async variant of generate_embeddings for callers running an event loop."""
         if not texts:
             logger.warning("Empty text list provided for batch embedding generation")
             return []
-            
-        all_embeddings = []
         
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i+batch_size]
-            batch_embeddings = []
-            
-            # Check cache first
-            uncached_texts = []
-            uncached_indices = []
-            
-            if self.use_cache:
-                for j, text in enumerate(batch_texts):
-                    cached_embedding = self._get_from_cache(text)
-                    if cached_embedding:
-                        self.stats["hits"] += 1
-                        batch_embeddings.append(cached_embedding)
-                    else:
-                        self.stats["misses"] += 1
-                        uncached_texts.append(text)
-                        uncached_indices.append(j)
-            else:
-                uncached_texts = batch_texts
-                uncached_indices = list(range(len(batch_texts)))
-                self.stats["misses"] += len(batch_texts)
-            
-            # Process uncached texts
-            if uncached_texts:
-                try:
-                    response = self.client.embeddings.create(
-                        input=uncached_texts,
-                        model=self.model
-                    )
-                    
-                    api_embeddings = [item.embedding for item in response.data]
-                    
-                    # Cache results
-                    if self.use_cache:
-                        for text, embedding in zip(uncached_texts, api_embeddings):
-                            self._save_to_cache(text, embedding)
-                    
-                    # Place embeddings in correct order
-                    for idx, embedding in zip(uncached_indices, api_embeddings):
-                        while len(batch_embeddings) <= idx:
-                            batch_embeddings.append(None)
-                        batch_embeddings[idx] = embedding
-                    
-                except Exception as e:
-                    error_msg = f"Error generating batch embeddings: {e}"
-                    logger.error(error_msg, batch=i//batch_size)
-                    # Use zeros as fallback
-                    for idx in uncached_indices:
-                        while len(batch_embeddings) <= idx:
-                            batch_embeddings.append(None)
-                        batch_embeddings[idx] = [0.0] * settings.embedding_dimensions
-            
-            # Ensure all positions have embeddings
-            for j in range(len(batch_texts)):
-                if j >= len(batch_embeddings) or batch_embeddings[j] is None:
-                    batch_embeddings.append([0.0] * settings.embedding_dimensions)
-            
-            all_embeddings.extend(batch_embeddings[:len(batch_texts)])
-            
-            # Respect API rate limits
-            if i + batch_size < len(texts):
-                time.sleep(0.5)
+        concurrency = concurrency or settings.embedding_concurrency
+        all_embeddings = await self._aembed_all(texts, batch_size, concurrency)
+        
+        # Writes complete in the background; the caller does not wait on disk
+        if self.use_cache:
+            self.flush_cache(wait=False)
         
         # Log cache stats once at the end
         total_processed = self.stats["hits"] + self.stats["misses"]
@@ -177,6 +313,99 @@ class EmbeddingGenerator:
         
         return all_embeddings
     
+    async def _aembed_all(self, texts: List[str], batch_size: int, concurrency: int) -> List[np.ndarray]:
+        """Embed all texts in batches, with at most ``concurrency`` API calls in flight."""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async with self._create_async_client() as client:
+            batches = await asyncio.gather(*(
+                self._aembed_batch(client, texts[i:i+batch_size], i // batch_size, semaphore)
+                for i in range(0, len(texts), batch_size)
+            ))
+        
+        return [embedding for batch in batches for embedding in batch]
+    
+    async def _aembed_batch(self, client: AsyncOpenAI, texts: List[str], batch_num: int,
+                            semaphore: asyncio.Semaphore) -> List[np.ndarray]:
+        """Embed one batch, serving what it can from the cache."""
+        batch_embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        
+        # Blank texts get the zero vector without a cache lookup or API call
+        indices = [j for j, text in enumerate(texts) if not self._is_blank(text)]
+        
+        # Check cache first, off the event loop
+        uncached_indices = []
+        
+        if self.use_cache:
+            # Hash each text once; the keys serve both the lookup and the save
+            keys = dict(zip(indices, self._cache_keys([texts[j] for j in indices])))
+            cached_embeddings = await asyncio.to_thread(self._get_many_from_cache, list(keys.values()))
+            for j, cached_embedding in zip(indices, cached_embeddings):
+                if cached_embedding is not None:
+                    self.stats["hits"] += 1
+                    batch_embeddings[j] = cached_embedding
+                else:
+                    self.stats["misses"] += 1
+                    uncached_indices.append(j)
+        else:
+            uncached_indices = indices
+            self.stats["misses"] += len(indices)
+        
+        # Process uncached texts, requesting each distinct text only once
+        if uncached_indices:
+            positions: Dict[str, List[int]] = defaultdict(list)
+            for j in uncached_indices:
+                positions[texts[j]].append(j)
+            unique_texts = list(positions)
+            
+            async with semaphore:
+                api_embeddings = await self._arequest_embeddings(client, unique_texts, batch_num)
+            
+            if api_embeddings is not None:
+                # Cache results
+                if self.use_cache:
+                    unique_keys = [keys[positions[text][0]] for text in unique_texts]
+                    await asyncio.to_thread(self._save_many_to_cache, unique_keys, api_embeddings)
+                
+                # Scatter each embedding to every position holding its text
+                for text, embedding in zip(unique_texts, api_embeddings):
+                    for idx in positions[text]:
+                        batch_embeddings[idx] = embedding
+        
+        # Use zeros as fallback for any position without an embedding
+        for j, embedding in enumerate(batch_embeddings):
+            if embedding is None:
+                batch_embeddings[j] = self._zero
+        
+        return batch_embeddings
+    
+    async def _arequest_embeddings(self, client: AsyncOpenAI, texts: List[str],
+                                   batch_num: int) -> Optional[List[np.ndarray]]:
+        """Call the embeddings API, backing off exponentially when rate limited."""
+        max_retries = settings.embedding_max_retries
+        
+        for attempt in range(max_retries + 1):
+            try:
+                response = await client.embeddings.create(
+                    input=texts,
+                    model=self.model
+                )
+                return [np.asarray(item.embedding, dtype=np.float32) for item in response.data]
+            except RateLimitError as e:
+                if attempt == max_retries:
+                    logger.error(f"Rate limit retries exhausted: {e}", batch=batch_num)
+                    return None
+                delay = 2 ** attempt * 0.1 + random.uniform(0, 0.1)
+                logger.warning(f"Rate limited, backing off", batch=batch_num,
+                               attempt=attempt + 1, delay=f"{delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                error_msg = f"Error generating batch embeddings: {e}"
+                logger.error(error_msg, batch=batch_num)
+                return None
+        
+        return None
+    
     def embed_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 20) -> List[Dict[str, Any]]:
         """Generate embeddings for a list of chunks."""
         # Extract texts from chunks
@@ -190,122 +419,134 @@ class EmbeddingGenerator:
         # Generate embeddings
         embeddings = self.generate_embeddings(texts, batch_size)
         
-        # Add embeddings to chunks
+        # Add embeddings to chunks as plain lists so they stay JSON serializable
         for i, embedding in enumerate(embeddings):
-            chunks[i]["embedding"] = embedding
+            chunks[i]["embedding"] = self._zero_list if embedding is self._zero else embedding.tolist()
         
         return chunks
     
-    def process_file(self, input_file: str, output_file: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Process a file containing chunks and add embeddings."""
+    def process_file(self, input_file: str, output_file: Optional[str] = None,
+                     batch_size: int = 20) -> int:
+        """Stream chunks from a file, add embeddings and return the number processed."""
         logger.info(f"Loading chunks from file", path=input_file)
         
-        # Load chunks
+        # Read enough chunks per window to keep every concurrent API slot busy
+        window_size = batch_size * settings.embedding_concurrency
+        count = 0
+        
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                chunks = json.load(f)
-            
-            logger.info(f"Loaded chunks from file", count=len(chunks))
-            
-            # Generate embeddings
-            chunks_with_embeddings = self.embed_chunks(chunks)
+            with open(input_file, 'rb') as f_in:
+                out = open(output_file, 'w', encoding='utf-8') if output_file else None
+                try:
+                    if out:
+                        out.write("[")
+                    
+                    for window in batched(ijson.items(f_in, 'item', use_float=True), window_size):
+                        chunks = self.embed_chunks(list(window), batch_size)
+                        
+                        # Write each chunk as soon as it is embedded
+                        if out:
+                            for chunk in chunks:
+                                out.write(("," if count else "") + serialization.dumps(chunk))
+                                count += 1
+                        else:
+                            count += len(chunks)
+                    
+                    if out:
+                        out.write("]")
+                finally:
+                    if out:
+                        out.close()
             
-            # Save to file if output_file is provided
+            logger.info(f"Processed chunks from file", count=count)
             if output_file:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(chunks_with_embeddings, f)
                 logger.info(f"Saved chunks with embeddings to file", 
-                           count=len(chunks_with_embeddings), 
+                           count=count, 
                            path=output_file)
             
-            return chunks_with_embeddings
+            return count
         except Exception as e:
             error_msg = f"Error processing file: {e}"
             logger.error(error_msg)
             raise APIError(error_msg, details={"input_file": input_file})
     
-    def _get_cache_path(self, text: str) -> str:
-        """Generate cache file path for a text."""
-        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
-        return os.path.join(self.cache_dir, f"{text_hash}.json")
+    def flush_cache(self, wait: bool = True) -> None:
+        """Hand buffered embeddings to the background writer, optionally waiting for it."""
+        if self._writer is not None:
+            self._writer.flush(wait)
     
-    def _get_from_cache(self, text: str) -> Optional[List[float]]:
-        """Get embedding from cache."""
-        cache_path = self._get_cache_path(text)
-        
-        if os.path.exists(cache_path):
-            try:
-                with open(cache_path, 'r') as f:
-                    data = json.load(f)
-                return data.get("embedding")
-            except Exception as e:
-                logger.error(f"Error reading from cache", path=cache_path, error=str(e))
+    def close(self) -> None:
+        """Flush buffered cache writes and close the cache."""
+        if self._writer is not None:
+            self._finalizer()
+        elif self.cache is not None:
+            self.cache.close()
+    
+    def __enter__(self) -> "EmbeddingGenerator":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _remember(self, text: str, embedding: np.ndarray) -> None:
+        """Add an embedding to the in-memory LRU cache."""
+        if self._mem_cache_max <= 0:
+            return
         
-        return None
+        # Shared between callers, so guard against in-place modification
+        embedding.setflags(write=False)
+        with self._mem_lock:
+            self._mem_cache[text] = embedding
+            if len(self._mem_cache) > self._mem_cache_max:
+                self._mem_cache.popitem(last=False)
+    
+    def _cache_key(self, text: str) -> bytes:
+        """Generate the cache key for a text."""
+        return _cache_hash(text.encode('utf-8')).digest()[:CACHE_KEY_BYTES]
     
-    def _save_to_cache(self, text: str, embedding: List[float]) -> None:
-        """Save embedding to cache."""
-        cache_path = self._get_cache_path(text)
+    @staticmethod
+    def _is_blank(text: str) -> bool:
+        """Whether a text is empty or whitespace only."""
+        return not text or text.isspace()
+    
+    def _cache_keys(self, texts: List[str]) -> List[bytes]:
+        """Generate cache keys for several texts."""
+        return [_cache_hash(data).digest()[:CACHE_KEY_BYTES]
+                for data in [text.encode('utf-8') for text in texts]]
+    
+    def _get_from_cache(self, key: bytes) -> Optional[np.ndarray]:
+        """Get embedding from cache, including writes not yet flushed."""
+        pending = self._writer.get(key)
+        if pending is not None:
+            return pending
         
         try:
-            with open(cache_path, 'w') as f:
-                json.dump({
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text,
-                    "model": self.model,
-                    "embedding": embedding,
-                    "timestamp": time.time()
-                }, f)
-            
-            # Manage cache size (simple LRU)
-            self._manage_cache_size()
+            return self.cache.get(key)
         except Exception as e:
-            logger.error(f"Error writing to cache", path=cache_path, error=str(e))
+            logger.error(f"Error reading from cache", path=self.cache_dir, error=str(e))
+        
+        return None
     
-    def _manage_cache_size(self) -> None:
-        """Manage cache size using LRU strategy."""
-        max_size_bytes = int(settings.max_cache_size_gb * 1024 * 1024 * 1024)
+    def _get_many_from_cache(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Get embeddings for several cache keys with a single cache lookup."""
+        embeddings = self._writer.get_many(keys)
         
-        # Get all cache files with their info
-        cache_files = []
-        for filename in os.listdir(self.cache_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.cache_dir, filename)
-                try:
-                    stats = os.stat(filepath)
-                    cache_files.append({
-                        'path': filepath,
-                        'size': stats.st_size,
-                        'last_access': stats.st_atime
-                    })
-                except Exception:
-                    pass
-        
-        # Calculate total size
-        total_size = sum(f['size'] for f in cache_files)
-        
-        # If over limit, remove oldest files
-        if total_size > max_size_bytes:
-            # Sort by last access time (oldest first)
-            cache_files.sort(key=lambda x: x['last_access'])
-            
-            # Remove files until under limit
-            bytes_to_remove = total_size - max_size_bytes
-            bytes_removed = 0
-            removed_count = 0
-            
-            for file_info in cache_files:
-                if bytes_removed >= bytes_to_remove:
-                    break
-                
-                try:
-                    os.remove(file_info['path'])
-                    bytes_removed += file_info['size']
-                    removed_count += 1
-                except Exception:
-                    pass
-            
-            mb_removed = bytes_removed / 1024 / 1024
-            logger.info(f"Cache cleanup completed", 
-                       files_removed=removed_count, 
-                       mb_removed=f"{mb_removed:.2f}", 
-                       total_files=len(cache_files))
\ No newline at end of file
+        missing = [j for j, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            try:
+                stored = self.cache.get_many([keys[j] for j in missing])
+                for j, embedding in zip(missing, stored):
+                    embeddings[j] = embedding
+            except Exception as e:
+                logger.error(f"Error reading from cache", path=self.cache_dir, error=str(e))
+        
+        return embeddings
+    
+    def _save_many_to_cache(self, keys: List[bytes], embeddings: List[np.ndarray]) -> None:
+        """Save embeddings for several cache keys."""
+        for key, embedding in zip(keys, embeddings):
+            self._writer.add(key, embedding)
+    
+    def _save_to_cache(self, key: bytes, embedding: np.ndarray) -> None:
+        """Buffer an embedding for the next cache flush."""
+        self._writer.add(key, embedding)
@@ -0,0 +1,251 @@
+"""
+FAISS vector store for PyTorch Documentation Search Tool.
+Serves the DatabaseManager query surface from a FAISS index with chunk
+documents and metadata kept in SQLite.
+"""
+
+import json
+import os
+import sqlite3
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from ptsearch.utils import logger
+from ptsearch.utils.error import ConfigError, DatabaseError
+from ptsearch.config import settings
+from ptsearch.core.database import DatabaseManager
+
+# FAISS is optional; only required when vector_backend is "faiss"
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+class FaissBackend(DatabaseManager):
+    """Stores chunk vectors in a FAISS inner-product index.
+
+    Vectors are L2-normalized so inner product equals cosine similarity, and
+    distances are reported as ``1 - similarity`` like the Chroma cosine space.
+    Small corpora use an exact ``IndexFlatIP``; once ``faiss_nlist * 39``
+    vectors are stored the index is retrained as ``IndexIVFFlat`` and searched
+    with ``faiss_nprobe`` lists. Ingest and vector formatting are inherited
+    from DatabaseManager.
+    """
+
+    # FAISS warns when an IVF index is trained on fewer points per list
+    TRAIN_POINTS_PER_LIST = 39
+
+    def __init__(self, db_dir: str = settings.db_dir, collection_name: str = settings.collection_name):
+        """Initialize the FAISS index and its chunk store."""
+        if faiss is None:
+            error_msg = "vector_backend 'faiss' requires the faiss-cpu package"
+            logger.error(error_msg)
+            raise ConfigError(error_msg)
+
+        self.db_dir = db_dir
+        self.collection_name = collection_name
+        self.version = 0
+        self.dimensions = settings.embedding_dimensions
+        self.index_path = os.path.join(db_dir, f"{collection_name}.faiss")
+        self._defer_save = False
+
+        # Shared read-only vector for empty or invalid embeddings
+        self._zero = np.zeros(self.dimensions, dtype=np.float32)
+        self._zero.setflags(write=False)
+
+        os.makedirs(db_dir, exist_ok=True)
+
+        try:
+            self._conn = sqlite3.connect(
+                os.path.join(db_dir, f"{collection_name}.sqlite"), check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "pos INTEGER PRIMARY KEY, id TEXT NOT NULL, document TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+            if os.path.exists(self.index_path):
+                self.index = faiss.read_index(self.index_path)
+                logger.info(f"Loaded FAISS index", path=self.index_path, vectors=self.index.ntotal)
+            else:
+                self.index = faiss.IndexFlatIP(self.dimensions)
+                logger.info(f"Created new FAISS index", path=self.index_path)
+        except Exception as e:
+            error_msg = f"Error opening FAISS index: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg, details={"collection": collection_name})
+
+        self._set_nprobe()
+
+    def reset_collection(self) -> None:
+        """Drop all vectors and chunks."""
+        self.index = faiss.IndexFlatIP(self.dimensions)
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks")
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self.version += 1
+        logger.info(f"Reset FAISS index", collection=self.collection_name)
+
+    def get_collection(self):
+        """Get the FAISS index."""
+        return self.index
+
+    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 50, id_offset: int = 0) -> None:
+        """Add chunks to the index and chunk store, then persist the index."""
+        total_batches = (len(chunks) - 1) // batch_size + 1
+        logger.info(f"Adding chunks in batches", count=len(chunks), batches=total_batches)
+
+        for i in range(0, len(chunks), batch_size):
+            batch = chunks[i:i + batch_size]
+            batch_num = i // batch_size + 1
+
+            ids = [str(chunk.get("id", id_offset + i + j)) for j, chunk in enumerate(batch)]
+            embeddings = self._ensure_matrix_format([chunk.get("embedding") for chunk in batch])
+            faiss.normalize_L2(embeddings)
+
+            # Positions in the index double as row keys in the chunk store
+            start = self.index.ntotal
+            try:
+                # The rows commit only once the index has accepted the vectors,
+                # so a rejected batch leaves both stores as they were
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO chunks (pos, id, document, metadata) VALUES (?, ?, ?, ?)",
+                        [(start + j, chunk_id, chunk.get("text", ""), json.dumps(chunk.get("metadata", {})))
+                         for j, (chunk_id, chunk) in enumerate(zip(ids, batch))]
+                    )
+                    self.index.add(embeddings)
+                self.version += 1
+                logger.info(f"Added batch", batch=batch_num, total=total_batches, chunks=len(batch))
+            except Exception as e:
+                # Drop vectors the index took if the commit itself failed
+                if self.index.ntotal > start:
+                    self.index.remove_ids(np.arange(start, self.index.ntotal, dtype=np.int64))
+                error_msg = f"Error adding batch {batch_num}: {e}"
+                logger.error(error_msg)
+                raise DatabaseError(error_msg, details={
+                    "batch": batch_num,
+                    "total_batches": total_batches,
+                    "batch_size": len(batch)
+                })
+
+        self._maybe_train()
+        if not self._defer_save:
+            self._save()
+
+    def query(self, query_embedding: List[float], n_results: int = 5,
+              filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Query the index, over-fetching when metadata filters are given."""
+        query = np.array(self._to_vector(query_embedding), dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(query)
+
+        ids, documents, metadatas, distances = [], [], [], []
+
+        try:
+            total = self.index.ntotal
+            k = min(total, n_results if not filters else n_results * 4)
+            seen = 0
+            while k > seen:
+                scores, positions = self.index.search(query, k)
+                candidates = [(int(pos), float(score)) for pos, score in zip(positions[0][seen:], scores[0][seen:])
+                              if pos >= 0]
+                rows = self._fetch_chunks([pos for pos, _ in candidates])
+
+                for pos, score in candidates:
+                    row = rows.get(pos)
+                    if row is None:
+                        continue
+                    chunk_id, document, metadata = row
+                    if filters and any(metadata.get(key) != value for key, value in filters.items()):
+                        continue
+                    ids.append(chunk_id)
+                    documents.append(document)
+                    metadatas.append(metadata)
+                    distances.append(1.0 - score)
+                    if len(ids) == n_results:
+                        break
+
+                if len(ids) == n_results or k == total:
+                    break
+                seen, k = k, min(total, k * 2)
+
+            if ids:
+                logger.info(f"Query completed", results_count=len(ids))
+
+            return {
+                "ids": [ids],
+                "documents": [documents],
+                "metadatas": [metadatas],
+                "distances": [distances]
+            }
+        except Exception as e:
+            error_msg = f"Error during query: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg)
+
+    def query_many(self, query_embeddings: List[Any], n_results: int = 5,
+                   filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Query the index once per embedding; searches are in-process so there is no round trip to share."""
+        return [self.query(query_embedding, n_results, filters) for query_embedding in query_embeddings]
+
+    def load_from_file(self, filepath: str, reset: bool = True, batch_size: int = 50) -> None:
+        """Load chunks from a file, writing the index once at the end."""
+        self._defer_save = True
+        try:
+            super().load_from_file(filepath, reset, batch_size)
+        finally:
+            self._defer_save = False
+        self._save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get basic statistics about the index."""
+        return {
+            "total_chunks": self.index.ntotal,
+            "collection_name": self.collection_name,
+            "db_dir": self.db_dir,
+            "index_type": type(self.index).__name__
+        }
+
+    def _fetch_chunks(self, positions: List[int]) -> Dict[int, tuple]:
+        """Read ids, documents and metadata for index positions."""
+        if not positions:
+            return {}
+        rows = self._conn.execute(
+            "SELECT pos, id, document, metadata FROM chunks WHERE pos IN (%s)" % ",".join("?" * len(positions)),
+            positions
+        )
+        return {pos: (chunk_id, document, json.loads(metadata)) for pos, chunk_id, document, metadata in rows}
+
+    def _maybe_train(self) -> None:
+        """Switch from the exact flat index to IVF once there are enough vectors to train it."""
+        nlist = settings.faiss_nlist
+        if not isinstance(self.index, faiss.IndexFlat) or self.index.ntotal < nlist * self.TRAIN_POINTS_PER_LIST:
+            return
+
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(self.dimensions), self.dimensions, nlist,
+                                   faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.add(vectors)
+        self.index = index
+        self._set_nprobe()
+        self.version += 1
+        logger.info(f"Trained IVF index", vectors=index.ntotal, nlist=nlist)
+
+    def _set_nprobe(self) -> None:
+        """Apply the configured number of probed lists to an IVF index."""
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = settings.faiss_nprobe
+
+    def _save(self) -> None:
+        """Write the index to disk."""
+        try:
+            faiss.write_index(self.index, self.index_path)
+        except Exception as e:
+            error_msg = f"Error saving FAISS index: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg, details={"path": self.index_path})
@@ -3,18 +3,78 @@ Result formatter module for PyTorch Documentation Search Tool.
 Formats and ranks search results.
 """
 
-from typing import List, Dict, Any, Optional
+import heapq
+import operator
+import sys
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import numpy as np
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import SearchError
 
+# Chunk types and ranking reasons compared or stored once per hit; one shared
+# interned object each, so hits reference them instead of holding copies
+CODE = sys.intern("code")
+TEXT = sys.intern("text")
+UNKNOWN = sys.intern("unknown")
+CODE_MATCH_REASON = sys.intern("code query & code content")
+TEXT_MATCH_REASON = sys.intern("concept query & text content")
+
+# C-level sort key for ranking hits
+_score = operator.attrgetter("score")
+
+@dataclass(slots=True)
+class SearchHit:
+    """A single formatted search result."""
+    
+    title: str
+    snippet: str
+    source: str
+    chunk_type: str
+    language: str
+    section: str
+    score: float
+    match_reason: Optional[str] = None
+    title_match: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the JSON result shape; ranking fields appear only when set."""
+        result = {
+            "title": self.title,
+            "snippet": self.snippet,
+            "source": self.source,
+            "chunk_type": self.chunk_type,
+            "language": self.language,
+            "section": self.section,
+            "score": self.score
+        }
+        if self.match_reason is not None:
+            result["match_reason"] = self.match_reason
+        if self.title_match:
+            result["title_match"] = True
+        return result
+
+
 class ResultFormatter:
     """Formats and ranks search results."""
     
+    MAX_SNIPPET_LENGTH = 250
+    
+    def __init__(self, result_shape: str = "auto"):
+        """Initialize formatter for "nested" or "flat" query results, or detect per call with "auto"."""
+        extractors = {
+            "nested": self._extract_nested,
+            "flat": self._extract_flat,
+            "auto": self._extract_auto
+        }
+        if result_shape not in extractors:
+            raise ValueError(f"Unknown result shape: {result_shape}")
+        self._extract = extractors[result_shape]
+    
     def format_results(self, results: Dict[str, Any], query: str) -> Dict[str, Any]:
-        """Format raw ChromaDB results into a structured response."""
-        formatted_results = []
-        
+        """Format raw ChromaDB results into a response holding SearchHit records."""
         # Handle empty results
         if results is None:
             logger.warning("Received None results to format")
@@ -26,64 +86,42 @@ class ResultFormatter:
         
         # Extract data from ChromaDB response
         try:
-            if isinstance(results.get('documents'), list):
-                if len(results['documents']) > 0 and isinstance(results['documents'][0], list):
-                    # Nested lists format (older ChromaDB versions)
-                    documents = results.get('documents', [[]])[0]
-                    metadatas = results.get('metadatas', [[]])[0]
-                    distances = results.get('distances', [[]])[0]
-                else:
-                    # Flat lists format (newer ChromaDB versions)
-                    documents = results.get('documents', [])
-                    metadatas = results.get('metadatas', [])
-                    distances = results.get('distances', [])
-            else:
-                # Empty or unexpected format
-                documents = []
-                metadatas = []
-                distances = []
+            documents, metadatas, distances = self._extract(results)
+            
+            # Nothing to format
+            if not documents:
+                return {
+                    "results": [],
+                    "query": query,
+                    "count": 0
+                }
                 
             # Log the number of results
             logger.info(f"Formatting search results", count=len(documents))
             
-            # Format each result
-            for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
-                # Create snippet
-                max_snippet_length = 250
-                snippet = doc[:max_snippet_length] + "..." if len(doc) > max_snippet_length else doc
-                
-                # Convert distance to similarity score (1.0 is exact match)
-                if isinstance(distance, (int, float)):
-                    similarity = 1.0 - distance
-                else:
-                    similarity = 0.5  # Default if distance is not a scalar
-                
-                # Extract metadata fields with fallbacks
-                if isinstance(metadata, dict):
-                    title = metadata.get("title", f"Result {i+1}")
-                    source = metadata.get("source", "")
-                    chunk_type = metadata.get("chunk_type", "unknown")
-                    language = metadata.get("language", "")
-                    section = metadata.get("section", "")
-                else:
-                    # Handle unexpected metadata format
-                    logger.warning(f"Unexpected metadata format", type=str(type(metadata)))
-                    title = f"Result {i+1}"
-                    source = ""
-                    chunk_type = "unknown"
-                    language = ""
-                    section = ""
-                
-                # Add formatted result
-                formatted_results.append({
-                    "title": title,
-                    "snippet": snippet,
-                    "source": source,
-                    "chunk_type": chunk_type,
-                    "language": language,
-                    "section": section,
-                    "score": round(float(similarity), 4)
-                })
+            # Convert distances to similarity scores (1.0 is exact match) in one pass
+            scores = self._similarities(distances)
+            limit = self.MAX_SNIPPET_LENGTH
+            
+            try:
+                formatted_results = [
+                    SearchHit(
+                        metadata.get("title", f"Result {i+1}"),
+                        doc[:limit] + "..." if len(doc) > limit else doc,
+                        metadata.get("source", ""),
+                        metadata.get("chunk_type", UNKNOWN),
+                        metadata.get("language", ""),
+                        metadata.get("section", ""),
+                        score
+                    )
+                    for i, (doc, metadata, score) in enumerate(zip(documents, metadatas, scores))
+                ]
+            except AttributeError:
+                # Some metadata is not a dict; format row by row with fallbacks
+                formatted_results = [
+                    self._format_result(i, doc, metadata, score)
+                    for i, (doc, metadata, score) in enumerate(zip(documents, metadatas, scores))
+                ]
         except Exception as e:
             error_msg = f"Error formatting results: {e}"
             logger.error(error_msg)
@@ -96,52 +134,142 @@ class ResultFormatter:
             "count": len(formatted_results)
         }
     
-    def rank_results(self, results: Dict[str, Any], is_code_query: bool) -> Dict[str, Any]:
-        """Rank results based on query type with intelligent scoring."""
+    @staticmethod
+    def _extract_nested(results: Dict[str, Any]) -> Tuple[List[Any], List[Any], List[Any]]:
+        """Extract the first result set from nested per-query lists."""
+        documents = results.get('documents') or [[]]
+        metadatas = results.get('metadatas') or [[]]
+        distances = results.get('distances') or [[]]
+        return documents[0], metadatas[0], distances[0]
+    
+    @staticmethod
+    def _extract_flat(results: Dict[str, Any]) -> Tuple[List[Any], List[Any], List[Any]]:
+        """Extract a result set from flat lists."""
+        return results.get('documents') or [], results.get('metadatas') or [], results.get('distances') or []
+    
+    def _extract_auto(self, results: Dict[str, Any]) -> Tuple[List[Any], List[Any], List[Any]]:
+        """Detect the result shape, then extract."""
+        documents = results.get('documents')
+        if isinstance(documents, list):
+            if len(documents) > 0 and isinstance(documents[0], list):
+                # Nested lists format (older ChromaDB versions)
+                return self._extract_nested(results)
+            # Flat lists format (newer ChromaDB versions)
+            return self._extract_flat(results)
+        
+        # Empty or unexpected format
+        return [], [], []
+    
+    def _similarities(self, distances: List[Any]) -> List[float]:
+        """Convert distances to similarity scores rounded to 4 places."""
+        try:
+            values = np.asarray(distances, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = None
+        
+        if values is None or values.ndim != 1:
+            # Default to 0.5 for any distance that is not a scalar
+            return [round(1.0 - float(d), 4) if isinstance(d, (int, float)) else 0.5 for d in distances]
+        
+        return np.where(np.isnan(values), 0.5, 1.0 - values).round(4).tolist()
+    
+    def _format_result(self, i: int, doc: str, metadata: Any, score: float) -> SearchHit:
+        """Format a single result, tolerating unexpected metadata."""
+        limit = self.MAX_SNIPPET_LENGTH
+        snippet = doc[:limit] + "..." if len(doc) > limit else doc
+        
+        # Extract metadata fields with fallbacks
+        if isinstance(metadata, dict):
+            title = metadata.get("title", f"Result {i+1}")
+            source = metadata.get("source", "")
+            chunk_type = metadata.get("chunk_type", UNKNOWN)
+            language = metadata.get("language", "")
+            section = metadata.get("section", "")
+        else:
+            # Handle unexpected metadata format
+            logger.warning(f"Unexpected metadata format", type=str(type(metadata)))
+            title = f"Result {i+1}"
+            source = ""
+            chunk_type = UNKNOWN
+            language = ""
+            section = ""
+        
+        return SearchHit(title, snippet, source, chunk_type, language, section, score)
+    
+    def rank_results(self, results: Dict[str, Any], is_code_query: bool,
+                     top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Rank results based on query type, keeping the ``top_k`` best (all when None)."""
         if "results" not in results or not results["results"]:
             return results
         
         formatted_results = results["results"]
+        self._boost(formatted_results, results.get("query", ""), is_code_query)
         
-        # Set up ranking parameters
-        boost_factor = 1.2  # 20% boost for matching content type
-        title_boost = 1.1   # 10% boost for matches in title
-        
-        for result in formatted_results:
-            base_score = result["score"]
-            
-            # Apply content type boosting
-            if is_code_query and result.get("chunk_type") == "code":
-                result["score"] = min(1.0, base_score * boost_factor)
-                result["match_reason"] = "code query & code content"
-            elif not is_code_query and result.get("chunk_type") == "text":
-                result["score"] = min(1.0, base_score * boost_factor)
-                result["match_reason"] = "concept query & text content"
-            
-            # Additional boosting for title matches
-            title = result.get("title", "").lower()
-            query_terms = results.get("query", "").lower().split()
-            
-            title_match = any(term in title for term in query_terms if len(term) > 3)
-            if title_match:
-                result["score"] = min(1.0, result["score"] * title_boost)
-                result["title_match"] = True
-            
-            # Round score for consistency
-            result["score"] = round(result["score"], 4)
-        
-        # Re-sort by score
-        formatted_results.sort(key=lambda x: x["score"], reverse=True)
+        # Re-sort by score; a partial heap selection when only the top hits are kept
+        if top_k is not None and top_k < len(formatted_results):
+            formatted_results = heapq.nlargest(top_k, formatted_results, key=_score)
+        else:
+            formatted_results.sort(key=_score, reverse=True)
         
         # Update results
         results["results"] = formatted_results
+        results["count"] = len(formatted_results)
         results["is_code_query"] = is_code_query
         
         # Log ranking results
         if formatted_results:
             logger.info(f"Ranked results", 
                        count=len(formatted_results), 
-                       top_score=formatted_results[0]["score"], 
+                       top_score=formatted_results[0].score, 
                        is_code_query=is_code_query)
         
-        return results
\ No newline at end of file
+        return results
+    
+    def iter_ranked(self, results: Dict[str, Any], is_code_query: bool,
+                    top_k: Optional[int] = None) -> Iterator[SearchHit]:
+        """Yield the ``top_k`` best hits best-first, popping each off a heap only when requested."""
+        formatted_results = results.get("results") or []
+        if not formatted_results:
+            return
+        self._boost(formatted_results, results.get("query", ""), is_code_query)
+        
+        # The index breaks score ties in database order, as the stable sort does
+        heap = [(-hit.score, i, hit) for i, hit in enumerate(formatted_results)]
+        heapq.heapify(heap)
+        for _ in range(len(heap) if top_k is None else min(top_k, len(heap))):
+            yield heapq.heappop(heap)[2]
+    
+    def _boost(self, formatted_results: List[SearchHit], query: str, is_code_query: bool) -> None:
+        """Boost hit scores in place for content type and title matches."""
+        # Set up ranking parameters
+        boost_factor = 1.2  # 20% boost for matching content type
+        title_boost = 1.1   # 10% boost for matches in title
+        
+        # Content type that matches the query intent, and the reason recorded for it
+        boosted_type = CODE if is_code_query else TEXT
+        match_reason = CODE_MATCH_REASON if is_code_query else TEXT_MATCH_REASON
+        query_terms = {term for term in query.lower().split() if len(term) > 3}
+        
+        scores = np.array([hit.score for hit in formatted_results], dtype=np.float64)
+        type_mask = np.array([hit.chunk_type == boosted_type for hit in formatted_results])
+        title_mask = np.array([
+            any(term in title for term in query_terms)
+            for title in (hit.title.lower() for hit in formatted_results)
+        ])
+        
+        # Apply content type boosting, then additional boosting for title matches
+        scores[type_mask] *= boost_factor
+        np.minimum(scores, 1.0, out=scores)
+        scores[title_mask] *= title_boost
+        np.minimum(scores, 1.0, out=scores)
+        
+        # Round score for consistency
+        np.round(scores, 4, out=scores)
+        
+        for hit, score, type_match, title_match in zip(formatted_results, scores.tolist(),
+                                                       type_mask.tolist(), title_mask.tolist()):
+            hit.score = score
+            if type_match:
+                hit.match_reason = match_reason
+            if title_match:
+                hit.title_match = True
@@ -3,16 +3,40 @@ Search module for PyTorch Documentation Search Tool.
 Combines embedding generation, database querying, and result formatting.
 """
 
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import copy
+import logging
+import re
+import threading
 import time
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import SearchError
 from ptsearch.config import settings
 from ptsearch.core.formatter import ResultFormatter
-from ptsearch.core.database import DatabaseManager
+from ptsearch.core.database import DatabaseManager, open_database
 from ptsearch.core.embedding import EmbeddingGenerator
 
+# Code indicator keywords, matched case-insensitively anywhere in the query
+CODE_INDICATORS = [
+    "code", "example", "implementation", "function", "class", "method",
+    "snippet", "syntax", "parameter", "argument", "return", "import",
+    "module", "api", "call", "invoke", "instantiate", "create", "initialize"
+]
+
+# Code patterns, matched case-sensitively
+CODE_PATTERNS = [
+    "def ", "class ", "import ", "from ", "torch.", "nn.",
+    "->", "=>", "==", "!=", "+=", "-=", "*=", "():", "@"
+]
+
+# One compiled alternation replaces a substring scan per keyword
+_CODE_QUERY_RE = re.compile(
+    "(?i:%s)|%s" % ("|".join(map(re.escape, CODE_INDICATORS)),
+                    "|".join(map(re.escape, CODE_PATTERNS)))
+)
+
 class SearchEngine:
     """Main search engine that combines all components."""
     
@@ -20,97 +44,271 @@ class SearchEngine:
                  embedding_generator: Optional[EmbeddingGenerator] = None):
         """Initialize search engine with components."""
         # Initialize components if not provided
-        self.database = database_manager or DatabaseManager()
+        self.database = database_manager or open_database()
         self.embedder = embedding_generator or EmbeddingGenerator()
-        self.formatter = ResultFormatter()
+        self.formatter = ResultFormatter(getattr(self.database, "result_shape", "auto"))
+        
+        # LRU of recent results, keyed on the query and the database version
+        self._results: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._results_max = settings.search_cache_size
+        self._results_lock = threading.Lock()
         
         logger.info("Search engine initialized")
     
+    def clear_cache(self) -> None:
+        """Drop all cached search results."""
+        with self._results_lock:
+            self._results.clear()
+    
     def search(self, query: str, num_results: int = settings.max_results, 
                filter_type: Optional[str] = None) -> Dict[str, Any]:
         """Search for documents matching the query."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         timing = {}
         
+        # Clean the query once; the cache key and query processing share it
+        cleaned = query.strip()
+        
+        # Serve repeated searches from the result cache
+        cache_key = (cleaned, num_results, filter_type, self.database.version)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            logger.info("Search served from cache", query=query, filter=filter_type)
+            return cached
+        
         try:
-            # Process query to get embedding and determine intent
-            query_start = time.time()
-            query_data = self._process_query(query)
-            query_end = time.time()
-            timing["query_processing"] = query_end - query_start
+            query_data, raw_results = self._retrieve(query, cleaned, num_results, filter_type, timing)
+            ranked_results = self._finish(query, query_data, raw_results, num_results, filter_type,
+                                          timing, start_time)
+            self._store_cached(cache_key, ranked_results)
+            return ranked_results
             
-            # Log search info
-            logger.info("Executing search", 
-                       query=query, 
-                       is_code_query=query_data["is_code_query"],
+        except Exception as e:
+            error_msg = f"Error during search: {e}"
+            logger.exception(error_msg)
+            raise SearchError(error_msg, details={
+                "query": query,
+                "filter": filter_type,
+                "time_taken": time.perf_counter() - start_time
+            })
+    
+    def search_stream(self, query: str, num_results: int = settings.max_results,
+                      filter_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Search like search(), yielding a "hit" event as ranking selects each result, then an "end" event.
+        
+        Embedding and the database query complete before the first hit; hits
+        are then popped best-first and handed out one at a time.
+        """
+        start_time = time.perf_counter()
+        timing = {}
+        cleaned = query.strip()
+        
+        cache_key = (cleaned, num_results, filter_type, self.database.version)
+        results = self._get_cached(cache_key)
+        if results is not None:
+            for hit in results["results"]:
+                yield {"event": "hit", **hit}
+        else:
+            try:
+                query_data, raw_results = self._retrieve(query, cleaned, num_results, filter_type, timing)
+                formatted_results = self.formatter.format_results(raw_results, query)
+                ranked = self.formatter.iter_ranked(formatted_results, query_data["is_code_query"], num_results)
+            except Exception as e:
+                error_msg = f"Error during search: {e}"
+                logger.exception(error_msg)
+                raise SearchError(error_msg, details={
+                    "query": query,
+                    "filter": filter_type,
+                    "time_taken": time.perf_counter() - start_time
+                })
+            
+            hits = []
+            for hit in ranked:
+                hit_dict = hit.to_dict()
+                hits.append(hit_dict)
+                yield {"event": "hit", **hit_dict}
+            
+            results = {
+                "results": hits,
+                "query": query,
+                "count": len(hits),
+                "is_code_query": query_data["is_code_query"]
+            }
+            self._attach_metadata(results, query_data, filter_type, timing, start_time)
+            self._store_cached(cache_key, results)
+        
+        yield {"event": "end", "query": results.get("query"), "metadata": results["metadata"]}
+    
+    def search_many(self, queries: List[str], num_results: int = settings.max_results,
+                    filter_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for several queries with one embedding request and one database query."""
+        start_time = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        
+        # Serve repeated searches from the result cache
+        cache_keys = [(query.strip(), num_results, filter_type, self.database.version) for query in queries]
+        pending = []
+        for i, cache_key in enumerate(cache_keys):
+            results[i] = self._get_cached(cache_key)
+            if results[i] is None:
+                pending.append(i)
+        
+        if not pending:
+            return results
+        
+        try:
+            # Embed every uncached query in one batched API call
+            query_start = time.perf_counter()
+            cleaned = [cache_keys[i][0] for i in pending]
+            embeddings = self.embedder.generate_embeddings(cleaned)
+            query_end = time.perf_counter()
+            
+            logger.info("Executing batch search",
+                       queries=len(pending),
+                       cached=len(queries) - len(pending),
                        filter=filter_type)
             
             # Create filters
             filters = {"chunk_type": filter_type} if filter_type else None
             
-            # Query database
-            db_start = time.time()
-            raw_results = self.database.query(
-                query_data["embedding"],
-                n_results=num_results,
-                filters=filters
-            )
-            db_end = time.time()
-            timing["database_query"] = db_end - db_start
+            # Query database for all embeddings at once
+            db_start = time.perf_counter()
+            raw_results = self.database.query_many(embeddings, n_results=self._candidates(num_results),
+                                                   filters=filters)
+            db_end = time.perf_counter()
             
-            # Format results
-            format_start = time.time()
-            formatted_results = self.formatter.format_results(raw_results, query)
-            format_end = time.time()
-            timing["format_results"] = format_end - format_start
+            # Shared stages are reported with their full batch duration
+            for i, query, embedding, raw in zip(pending, cleaned, embeddings, raw_results):
+                timing = {
+                    "query_processing": query_end - query_start,
+                    "database_query": db_end - db_start
+                } if settings.debug_timings else {}
+                query_data = self._query_data(query, embedding)
+                results[i] = self._finish(queries[i], query_data, raw, num_results, filter_type,
+                                          timing, start_time)
+                self._store_cached(cache_keys[i], results[i])
             
-            # Rank results based on query intent
-            rank_start = time.time()
-            ranked_results = self.formatter.rank_results(
-                formatted_results,
-                query_data["is_code_query"]
-            )
-            rank_end = time.time()
-            timing["rank_results"] = rank_end - rank_start
-            
-            # Add timing information and search metadata
-            end_time = time.time()
-            total_time = end_time - start_time
-            
-            # Add metadata to results
-            result_count = len(ranked_results.get("results", []))
-            ranked_results["metadata"] = {
-                "timing": timing,
-                "total_time": total_time,
-                "result_count": result_count,
-                "is_code_query": query_data["is_code_query"],
-                "filter": filter_type
-            }
-            
-            logger.info("Search completed", 
-                      result_count=result_count,
-                      time_taken=f"{total_time:.3f}s",
-                      is_code_query=query_data["is_code_query"])
-            
-            return ranked_results
+            return results
             
         except Exception as e:
-            error_msg = f"Error during search: {e}"
+            error_msg = f"Error during batch search: {e}"
             logger.exception(error_msg)
             raise SearchError(error_msg, details={
-                "query": query,
+                "queries": queries,
                 "filter": filter_type,
-                "time_taken": time.time() - start_time
+                "time_taken": time.perf_counter() - start_time
             })
     
-    def _process_query(self, query: str) -> Dict[str, Any]:
-        """Process query to determine intent and generate embedding."""
-        # Clean query
-        query = query.strip()
+    def _retrieve(self, query: str, cleaned: str, num_results: int, filter_type: Optional[str],
+                  timing: Dict[str, float]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Embed a stripped query and fetch its ranking candidates from the database."""
+        # Process query to get embedding and determine intent
+        query_start = time.perf_counter()
+        query_data = self._process_query(cleaned)
+        if settings.debug_timings:
+            timing["query_processing"] = time.perf_counter() - query_start
+        
+        # Log search info
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Executing search", 
+                       query=query, 
+                       is_code_query=query_data["is_code_query"],
+                       filter=filter_type)
+        
+        # Create filters
+        filters = {"chunk_type": filter_type} if filter_type else None
+        
+        # Query database
+        db_start = time.perf_counter()
+        raw_results = self.database.query(
+            query_data["embedding"],
+            n_results=self._candidates(num_results),
+            filters=filters
+        )
+        if settings.debug_timings:
+            timing["database_query"] = time.perf_counter() - db_start
+        
+        return query_data, raw_results
+    
+    def _finish(self, query: str, query_data: Dict[str, Any], raw_results: Dict[str, Any], num_results: int,
+                filter_type: Optional[str], timing: Dict[str, float], start_time: float) -> Dict[str, Any]:
+        """Format and rank raw database results and attach search metadata."""
+        # Format results
+        format_start = time.perf_counter()
+        formatted_results = self.formatter.format_results(raw_results, query)
+        if settings.debug_timings:
+            timing["format_results"] = time.perf_counter() - format_start
+        
+        # Rank results based on query intent, keeping the best num_results candidates
+        rank_start = time.perf_counter()
+        ranked_results = self.formatter.rank_results(
+            formatted_results,
+            query_data["is_code_query"],
+            top_k=num_results
+        )
+        if settings.debug_timings:
+            timing["rank_results"] = time.perf_counter() - rank_start
+        
+        # Hits stay slotted records through ranking; the response carries plain dicts
+        ranked_results["results"] = [hit.to_dict() for hit in ranked_results.get("results", [])]
+        
+        self._attach_metadata(ranked_results, query_data, filter_type, timing, start_time)
+        return ranked_results
+    
+    def _attach_metadata(self, ranked_results: Dict[str, Any], query_data: Dict[str, Any],
+                         filter_type: Optional[str], timing: Dict[str, float], start_time: float) -> None:
+        """Add search metadata to ranked results; per-stage timing only when debugging."""
+        total_time = time.perf_counter() - start_time
+        result_count = len(ranked_results.get("results", []))
+        ranked_results["metadata"] = {
+            "total_time": total_time,
+            "result_count": result_count,
+            "is_code_query": query_data["is_code_query"],
+            "filter": filter_type
+        }
+        if settings.debug_timings:
+            ranked_results["metadata"]["timing"] = timing
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Search completed", 
+                      result_count=result_count,
+                      time_taken=f"{total_time:.3f}s",
+                      is_code_query=query_data["is_code_query"])
+    
+    @staticmethod
+    def _candidates(num_results: int) -> int:
+        """Database hits to fetch so that ranking boosts can promote hits below the cutoff."""
+        return num_results * max(1, settings.rank_candidates)
+    
+    def _get_cached(self, cache_key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached result marked as cached, or None."""
+        with self._results_lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+        if cached is None:
+            return None
         
-        # Generate embedding
-        embedding = self.embedder.generate_embedding(query)
+        results = copy.deepcopy(cached)
+        results["metadata"]["cached"] = True
+        return results
+    
+    def _store_cached(self, cache_key: Tuple[Any, ...], results: Dict[str, Any]) -> None:
+        """Add a copy of a result to the LRU cache."""
+        if self._results_max <= 0:
+            return
         
+        with self._results_lock:
+            self._results[cache_key] = copy.deepcopy(results)
+            if len(self._results) > self._results_max:
+                self._results.popitem(last=False)
+    
+    def _process_query(self, query: str) -> Dict[str, Any]:
+        """Process an already stripped query to determine intent and generate embedding."""
+        return self._query_data(query, self.embedder.generate_embedding(query))
+    
+    def _query_data(self, query: str, embedding: Any) -> Dict[str, Any]:
+        """Combine a stripped query, its embedding and its intent."""
         # Determine if this is a code query
         is_code_query = self._is_code_query(query)
         
@@ -122,28 +320,25 @@ class SearchEngine:
     
     def _is_code_query(self, query: str) -> bool:
         """Determine if a query is looking for code."""
-        query_lower = query.lower()
-        
-        # Code indicator keywords
-        code_indicators = [
-            "code", "example", "implementation", "function", "class", "method",
-            "snippet", "syntax", "parameter", "argument", "return", "import",
-            "module", "api", "call", "invoke", "instantiate", "create", "initialize"
-        ]
-        
-        # Check for code indicators
-        for indicator in code_indicators:
-            if indicator in query_lower:
-                return True
-        
-        # Check for code patterns
-        code_patterns = [
-            "def ", "class ", "import ", "from ", "torch.", "nn.",
-            "->", "=>", "==", "!=", "+=", "-=", "*=", "():", "@"
-        ]
-        
-        for pattern in code_patterns:
-            if pattern in query:
-                return True
-        
-        return False
\ No newline at end of file
+        return _CODE_QUERY_RE.search(query) is not None
+
+
+# Search engine shared within the process, created on first use
+_engine: Optional[SearchEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SearchEngine:
+    """Return the shared search engine, opening the database and embedder on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SearchEngine(open_database(), EmbeddingGenerator())
+    return _engine
+
+
+def close_engine() -> None:
+    """Write out pending embedding cache entries of the shared engine, if one was built."""
+    if _engine is not None:
+        _engine.embedder.close()
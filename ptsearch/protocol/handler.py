@@ -3,35 +3,66 @@ MCP protocol handler for PyTorch Documentation Search Tool.
 Processes MCP messages and dispatches to appropriate handlers.
 """
 
-import json
 from typing import Dict, Any, Optional, Callable, List, Union
 
 from ptsearch.utils import logger
+from ptsearch.utils import serialization
 from ptsearch.utils.error import ProtocolError, format_error
 from ptsearch.protocol.descriptor import get_tool_descriptor
 
 # Define handler type for protocol methods
 HandlerType = Callable[[Dict[str, Any]], Dict[str, Any]]
+BatchHandlerType = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
 
 class MCPProtocolHandler:
     """Handler for MCP protocol messages."""
     
-    def __init__(self, search_handler: HandlerType):
-        """Initialize with search handler function."""
+    def __init__(self, search_handler: HandlerType, batch_search_handler: Optional[BatchHandlerType] = None):
+        """Initialize with search handler function and an optional batch variant."""
         self.search_handler = search_handler
+        self.batch_search_handler = batch_search_handler
         self.tool_descriptor = get_tool_descriptor()
+        
+        # Fixed responses and the tool name, built once; _format_response only nests them
+        self._tool_name = self.tool_descriptor["name"]
+        self._capabilities = {"capabilities": ["tools"]}
+        self._tools_list = {"tools": [self.tool_descriptor]}
+        
         self.handlers: Dict[str, HandlerType] = {
             "initialize": self._handle_initialize,
             "list_tools": self._handle_list_tools,
-            "call_tool": self._handle_call_tool
+            "call_tool": self._handle_call_tool,
+            "call_tool_batch": self._handle_call_tool_batch
         }
     
-    def process_message(self, message: str) -> str:
-        """Process an MCP message and return the response."""
+    def process_message(self, message: Union[str, bytes]) -> str:
+        """Process an MCP message (text or UTF-8 bytes) and return the response."""
+        return self._process_serialized(message, serialization.dumps)
+    
+    def process_message_bytes(self, message: bytes) -> bytes:
+        """Process an MCP message in UTF-8 bytes and return the response as UTF-8 bytes."""
+        return self._process_serialized(message, serialization.dumps_bytes)
+    
+    def _process_serialized(self, message: Union[str, bytes], dumps: Callable[[Any], Any]) -> Any:
+        """Parse a message, dispatch it, and serialize the response with ``dumps``."""
         try:
             # Parse the message
-            data = json.loads(message)
-            
+            data = serialization.loads(message)
+        except serialization.JSONDecodeError:
+            logger.error("Invalid JSON message")
+            error = ProtocolError("Invalid JSON", -32700)
+            return dumps(self._format_error(None, error))
+        
+        response = self.process_message_obj(data)
+        try:
+            return dumps(response)
+        except Exception as e:
+            logger.exception(f"Error serializing response: {e}")
+            return dumps(self._format_error(response.get("id"), e))
+    
+    def process_message_obj(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process a parsed MCP message and return the response object."""
+        try:
             # Get the method and message ID
             method = data.get("method", "")
             message_id = data.get("id")
@@ -47,21 +78,17 @@ class MCPProtocolHandler:
                 error = ProtocolError(f"Unknown method: {method}", -32601)
                 return self._format_error(message_id, error)
                 
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON message")
-            error = ProtocolError("Invalid JSON", -32700)
-            return self._format_error(None, error)
         except Exception as e:
             logger.exception(f"Error processing message: {e}")
-            return self._format_error(data.get("id") if 'data' in locals() else None, e)
+            return self._format_error(data.get("id") if isinstance(data, dict) else None, e)
     
     def _handle_initialize(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle initialize request."""
-        return {"capabilities": ["tools"]}
+        return self._capabilities
     
     def _handle_list_tools(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle list_tools request."""
-        return {"tools": [self.tool_descriptor]}
+        return self._tools_list
     
     def _handle_call_tool(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle call_tool request."""
@@ -69,23 +96,41 @@ class MCPProtocolHandler:
         tool_name = params.get("tool")
         args = params.get("args", {})
         
-        if tool_name != self.tool_descriptor["name"]:
+        if tool_name != self._tool_name:
             raise ProtocolError(f"Unknown tool: {tool_name}", -32602)
         
         # Execute search through handler
         result = self.search_handler(args)
         return {"result": result}
     
-    def _format_response(self, id: Optional[str], result: Dict[str, Any]) -> str:
+    def _handle_call_tool_batch(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle call_tool_batch request with one args dict per call."""
+        params = data.get("params", {})
+        tool_name = params.get("tool")
+        calls = params.get("calls", [])
+        
+        if tool_name != self._tool_name:
+            raise ProtocolError(f"Unknown tool: {tool_name}", -32602)
+        if not isinstance(calls, list):
+            raise ProtocolError("calls must be a list of argument objects", -32602)
+        
+        # Execute searches together when a batch handler is available
+        if self.batch_search_handler is not None:
+            results = self.batch_search_handler(calls)
+        else:
+            results = [self.search_handler(args) for args in calls]
+        return {"results": results}
+    
+    def _format_response(self, id: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
         """Format a successful response."""
         response = {
             "jsonrpc": "2.0",
             "id": id,
             "result": result
         }
-        return json.dumps(response)
+        return response
     
-    def _format_error(self, id: Optional[str], error: Union[ProtocolError, Exception]) -> str:
+    def _format_error(self, id: Optional[str], error: Union[ProtocolError, Exception]) -> Dict[str, Any]:
         """Format an error response."""
         error_dict = format_error(error)
         
@@ -101,4 +146,4 @@ class MCPProtocolHandler:
         if "details" in error_dict:
             response["error"]["data"] = error_dict["details"]
             
-        return json.dumps(response)
\ No newline at end of file
+        return response
\ No newline at end of file
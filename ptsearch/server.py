@@ -6,20 +6,27 @@ Provides both STDIO and SSE transport support for Claude Code CLI integration.
 
 import os
 import sys
-import json
 import logging
 import time
+import itertools
 import asyncio
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 
-from flask import Flask, Response, request, jsonify, stream_with_context, g, abort
+from flask import Flask, Response, request, stream_with_context, g, abort
 from flask_cors import CORS
 
-from ptsearch.utils import logger
+from ptsearch.utils import logger, serialization
 from ptsearch.config import settings
-from ptsearch.core import DatabaseManager, EmbeddingGenerator, SearchEngine
+from ptsearch.core import get_engine, close_engine
 from ptsearch.protocol import MCPProtocolHandler, get_tool_descriptor
 from ptsearch.transport import STDIOTransport, SSETransport
+from ptsearch.transport.keepalive import (
+    KeepaliveTicker, StreamLimiter, KEEPALIVE_FRAME, STREAM_RETRY_AFTER_SECONDS
+)
+from ptsearch.transport.wsgi import WSGIServer
+
+# Seconds between SSE keep-alive comments
+SSE_KEEPALIVE_SECONDS = 15
 
 # Early API key validation
 if not os.environ.get("OPENAI_API_KEY"):
@@ -42,46 +49,97 @@ def format_search_results(results: Dict[str, Any], query: str) -> str:
     return result_text
 
 
-def search_handler(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle search requests from the MCP protocol."""
-    # Initialize search components
-    db_manager = DatabaseManager()
-    embedding_generator = EmbeddingGenerator()
-    search_engine = SearchEngine(db_manager, embedding_generator)
-    
-    # Extract search parameters
+def _search_args(args: Dict[str, Any]) -> Tuple[str, int, Optional[str]]:
+    """Extract the query, result count and filter from tool call arguments."""
     query = args.get("query", "")
     n = int(args.get("num_results", settings.max_results))
-    filter_type = args.get("filter", "")
     
     # Handle empty string filter as None
-    if filter_type == "":
-        filter_type = None
+    filter_type = args.get("filter", "") or None
+    return query, n, filter_type
+
+
+def search_handler(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle search requests from the MCP protocol."""
+    query, n, filter_type = _search_args(args)
     
     # Echo for testing
     if query == "echo:ping":
         return {"ok": True}
     
     # Execute search
-    return search_engine.search(query, n, filter_type)
+    return get_engine().search(query, n, filter_type)
+
+
+def batch_search_handler(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Handle several search requests, sharing embedding and database work."""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+    
+    # Group calls that can share one batched search
+    groups: Dict[Any, List[int]] = {}
+    for i, args in enumerate(calls):
+        query, n, filter_type = _search_args(args)
+        if query == "echo:ping":
+            results[i] = {"ok": True}
+            continue
+        groups.setdefault((n, filter_type), []).append(i)
+    
+    for (n, filter_type), indices in groups.items():
+        queries = [calls[i].get("query", "") for i in indices]
+        for i, result in zip(indices, get_engine().search_many(queries, n, filter_type)):
+            results[i] = result
+    
+    return results
+
+
+def _request_json() -> Any:
+    """Parse the request body as JSON regardless of its content type."""
+    try:
+        return serialization.loads(request.get_data())
+    except serialization.JSONDecodeError as e:
+        abort(400, description=f"Invalid JSON: {e}")
+
+
+def _json_response(obj: Any, status: int = 200) -> Response:
+    """Build a JSON response without going through Flask's stdlib encoder."""
+    return Response(serialization.dumps_bytes(obj), status=status, mimetype="application/json")
 
 
 def create_flask_app() -> Flask:
     """Create and configure Flask app for SSE transport."""
     app = Flask("ptsearch_sse")
     CORS(app)  # Enable CORS for all routes
-    seq = 0
+    seq = itertools.count()  # next() is atomic, so threaded requests get distinct ids
+    
+    # Tool list with endpoint info for SSE transport, built once per app
+    tool_descriptor = get_tool_descriptor()
+    tool_descriptor["endpoint"] = {
+        "path": "/tools/call",
+        "method": "POST"
+    }
+    tool_list_payload = serialization.dumps_bytes([tool_descriptor])
+    
+    # Complete SSE frames, encoded once and replayed to every new stream
+    sse_frames = [
+        (tag, b"event: " + tag.encode() + b"\ndata: " + tool_list_payload + b"\n\n")
+        for tag in ("tool_list", "tools")
+    ]
+    
+    # One timer thread wakes every open event stream for keep-alives
+    keepalive = KeepaliveTicker(SSE_KEEPALIVE_SECONDS)
+    app.extensions["keepalive"] = keepalive
+    streams = StreamLimiter(settings.server_max_streams)
     
     @app.before_request
     def tag_request():
-        nonlocal seq
-        g.cid = f"c{int(time.time())}-{seq}"
-        seq += 1
-        logger.info(f"[{g.cid}] {request.method} {request.path}")
+        g.cid = f"c{int(time.time())}-{next(seq)}"
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"[{g.cid}] {request.method} {request.path}")
 
     @app.after_request
     def log_response(resp):
-        logger.info(f"[{g.cid}] → {resp.status}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"[{g.cid}] → {resp.status}")
         return resp
 
     # SSE events endpoint for tool registration
@@ -89,35 +147,40 @@ def create_flask_app() -> Flask:
     def events():
         cid = g.cid
         
+        # Every stream holds a worker thread until the client goes away
+        if not streams.acquire():
+            logger.warning(f"[{cid}] rejecting event stream", limit=streams.limit)
+            return Response(
+                "Too many open event streams",
+                status=503,
+                headers={"Retry-After": str(STREAM_RETRY_AFTER_SECONDS)},
+            )
+        
         def stream():
-            tool_descriptor = get_tool_descriptor()
-            # Add endpoint info for SSE transport
-            tool_descriptor["endpoint"] = {
-                "path": "/tools/call",
-                "method": "POST"
-            }
+            for tag, frame in sse_frames:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[{cid}] send {tag}")
+                yield frame
             
-            payload = json.dumps([tool_descriptor])
-            for tag in ("tool_list", "tools"):
-                logger.debug(f"[{cid}] send {tag}")
-                yield f"event: {tag}\ndata: {payload}\n\n"
-            
-            # Keep-alive loop
-            n = 0
+            # Keep-alive loop; ends when the ticker is stopped
+            tick = keepalive.tick
             while True:
-                n += 1
-                time.sleep(15)
-                yield f": ka-{n}\n\n"
+                tick = keepalive.wait(tick)
+                if tick is None:
+                    return
+                yield KEEPALIVE_FRAME
         
-        return Response(
+        response = Response(
             stream_with_context(stream()),
             mimetype="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "X-Accel-Buffering": "no",
-                "Connection": "keep-alive",
             },
         )
+        # Runs when the server closes the response, even if the stream never started
+        response.call_on_close(streams.release)
+        return response
 
     # Call handling
     def handle_call(body):
@@ -127,25 +190,29 @@ def create_flask_app() -> Flask:
         args = body.get("args", {})
         return search_handler(args)
 
-    # Register endpoints for various call paths
+    def call_tool():
+        return _json_response(handle_call(_request_json()))
+
+    # Batched calls share one embedding request and one database query
+    @app.route("/tools/call_batch", methods=["POST"])
+    def call_tool_batch():
+        body = _request_json()
+        if body.get("tool") != settings.tool_name:
+            abort(400, description=f"Unknown tool: {body.get('tool')}. Expected: {settings.tool_name}")
+        
+        calls = body.get("calls", [])
+        if not isinstance(calls, list):
+            abort(400, description="calls must be a list of argument objects")
+        return _json_response(batch_search_handler(calls))
+
+    # Register one view for the various call paths
     for path in ("/tools/call", "/call", "/invoke", "/run"):
-        app.add_url_rule(
-            path,
-            path,
-            lambda path=path: jsonify(handle_call(request.get_json(force=True))),
-            methods=["POST"],
-        )
+        app.add_url_rule(path, path, call_tool, methods=["POST"])
 
     # List tools
     @app.route("/tools/list")
     def list_tools():
-        tool_descriptor = get_tool_descriptor()
-        # Add endpoint info for SSE transport
-        tool_descriptor["endpoint"] = {
-            "path": "/tools/call",
-            "method": "POST"
-        }
-        return jsonify([tool_descriptor])
+        return Response(tool_list_payload, mimetype="application/json")
 
     # Health check
     @app.route("/health")
@@ -156,12 +223,33 @@ def create_flask_app() -> Flask:
     @app.route("/search", methods=["POST"])
     def search():
         try:
-            data = request.get_json(force=True)
+            data = _request_json()
             results = search_handler(data)
-            return jsonify(results)
+            return _json_response(results)
         except Exception as e:
             logger.exception(f"Error handling search: {e}")
-            return jsonify({"error": str(e)}), 500
+            return _json_response({"error": str(e)}, 500)
+
+    # Streaming search endpoint, one NDJSON event per line: "start" goes out
+    # before the search runs, then a "hit" per result as ranking selects it, then
+    # "end" with the metadata; a failure after "start" arrives as an "error" event
+    @app.route("/search_stream", methods=["POST"])
+    def search_stream():
+        query, n, filter_type = _search_args(_request_json())
+        
+        def stream():
+            yield serialization.dumps_bytes({"event": "start", "query": query}) + b"\n"
+            if query == "echo:ping":
+                yield serialization.dumps_bytes({"event": "end", "query": query, "metadata": {}}) + b"\n"
+                return
+            try:
+                for event in get_engine().search_stream(query, n, filter_type):
+                    yield serialization.dumps_bytes(event) + b"\n"
+            except Exception as e:
+                logger.exception(f"Error handling search: {e}")
+                yield serialization.dumps_bytes({"event": "error", "error": str(e)}) + b"\n"
+        
+        return Response(stream(), mimetype="application/x-ndjson")
 
     return app
 
@@ -171,7 +259,7 @@ def run_stdio_server():
     logger.info("Starting PyTorch Documentation Search MCP Server with STDIO transport")
     
     # Initialize protocol handler with search handler
-    protocol_handler = MCPProtocolHandler(search_handler)
+    protocol_handler = MCPProtocolHandler(search_handler, batch_search_handler)
     
     # Initialize and start STDIO transport
     transport = STDIOTransport(protocol_handler)
@@ -184,7 +272,13 @@ def run_sse_server(host: str = "0.0.0.0", port: int = 5000, debug: bool = False)
     print(f"Run: claude mcp add --transport sse {settings.tool_name} http://{host}:{port}/events")
     
     app = create_flask_app()
-    app.run(host=host, port=port, debug=debug, threaded=True)
+    try:
+        if debug:
+            app.run(host=host, port=port, debug=debug, threaded=True)
+        else:
+            WSGIServer(app, host, port).serve()
+    finally:
+        app.extensions["keepalive"].stop()
 
 
 def run_server(transport_type: str = "stdio", host: str = "0.0.0.0", port: int = 5000, debug: bool = False):
@@ -203,13 +297,16 @@ def run_server(transport_type: str = "stdio", host: str = "0.0.0.0", port: int =
                current_dir=os.getcwd())
     
     # Start the appropriate transport
-    if transport_type.lower() == "stdio":
-        run_stdio_server()
-    elif transport_type.lower() == "sse":
-        run_sse_server(host, port, debug)
-    else:
-        logger.error(f"Unknown transport type: {transport_type}")
-        sys.exit(1)
+    try:
+        if transport_type.lower() == "stdio":
+            run_stdio_server()
+        elif transport_type.lower() == "sse":
+            run_sse_server(host, port, debug)
+        else:
+            logger.error(f"Unknown transport type: {transport_type}")
+            sys.exit(1)
+    finally:
+        close_engine()
 
 
 def main():
@@ -2,8 +2,8 @@
 Transport implementations for PyTorch Documentation Search Tool.
 """
 
-from ptsearch.transport.base import BaseTransport
+from ptsearch.transport.base import BaseTransport, TransportBase
 from ptsearch.transport.stdio import STDIOTransport
 from ptsearch.transport.sse import SSETransport
 
-__all__ = ["BaseTransport", "STDIOTransport", "SSETransport"]
\ No newline at end of file
+__all__ = ["BaseTransport", "TransportBase", "STDIOTransport", "SSETransport"]
\ No newline at end of file
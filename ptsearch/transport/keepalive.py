@@ -0,0 +1,75 @@
+"""
+Shared SSE stream helpers for PyTorch Documentation Search Tool.
+One background thread ticks for every open event stream, and a limiter
+caps how many streams may be open at once.
+"""
+
+import threading
+from typing import Optional
+
+# SSE comment frame sent on every tick; clients ignore its content
+KEEPALIVE_FRAME = b": ka\n\n"
+
+# Seconds a client turned away by StreamLimiter is told to wait
+STREAM_RETRY_AFTER_SECONDS = 5
+
+
+class KeepaliveTicker:
+    """Broadcasts a keep-alive tick to all waiting SSE streams from a single timer thread."""
+
+    def __init__(self, interval: float = 15.0):
+        """Initialize ticker; the timer thread starts with the first stream."""
+        self.interval = interval
+        self._tick = 0
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def tick(self) -> int:
+        """Number of ticks so far."""
+        return self._tick
+
+    def wait(self, last: int) -> Optional[int]:
+        """Block until the tick after ``last`` and return it, or None once stopped."""
+        self._ensure_started()
+        with self._cond:
+            self._cond.wait_for(lambda: self._tick > last or self._stopped.is_set())
+            return None if self._stopped.is_set() else self._tick
+
+    def stop(self) -> None:
+        """Stop ticking and release every waiting stream."""
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _ensure_started(self) -> None:
+        """Start the timer thread if it is not running."""
+        with self._cond:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="ptsearch-sse-keepalive", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Tick every ``interval`` seconds until stopped."""
+        while not self._stopped.wait(self.interval):
+            with self._cond:
+                self._tick += 1
+                self._cond.notify_all()
+
+
+class StreamLimiter:
+    """Caps concurrently open SSE streams so they cannot occupy every server worker thread."""
+
+    def __init__(self, limit: int):
+        """Initialize limiter with ``limit`` stream slots."""
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def acquire(self) -> bool:
+        """Take a slot without blocking; False when every slot is in use."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self) -> None:
+        """Return a slot taken by acquire()."""
+        self._slots.release()
@@ -3,20 +3,47 @@ Server-Sent Events (SSE) transport implementation for PyTorch Documentation Sear
 Provides an HTTP server for MCP using Flask and SSE.
 """
 
-import json
-import time
-from typing import Dict, Any, Optional, Iterator
+import functools
+import logging
+from typing import Dict, Any, Optional, Iterator, Callable
 
-from flask import Flask, Response, request, jsonify, stream_with_context, g
+from flask import Flask, Response, request, stream_with_context, g
 from flask_cors import CORS
 
-from ptsearch.utils import logger
+from ptsearch.utils import logger, serialization
+from ptsearch.config import settings
 from ptsearch.utils.error import TransportError, format_error
 from ptsearch.protocol import MCPProtocolHandler, get_tool_descriptor
-from ptsearch.transport.base import BaseTransport
+from ptsearch.transport.base import TransportBase
+from ptsearch.transport.keepalive import (
+    KeepaliveTicker, StreamLimiter, KEEPALIVE_FRAME, STREAM_RETRY_AFTER_SECONDS
+)
+from ptsearch.transport.wsgi import WSGIServer
 
 
-class SSETransport(BaseTransport):
+def _json_response(obj: Any, status: int = 200) -> Response:
+    """Build a JSON response without going through Flask's stdlib encoder."""
+    return Response(serialization.dumps_bytes(obj), status=status, mimetype="application/json")
+
+
+def _json_endpoint(view: Callable[..., Dict[str, Any]]) -> Callable[..., Response]:
+    """Turn a view returning an MCP response into a JSON endpoint with shared error handling."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs) -> Response:
+        try:
+            response = view(*args, **kwargs)
+            if "error" in response:
+                return _json_response({"error": response["error"]["message"]}, 400)
+            return _json_response(response["result"]["result"])
+        except Exception as e:
+            logger.exception(f"Error handling {view.__name__}: {e}")
+            error_dict = format_error(e)
+            return _json_response({"error": error_dict["error"]}, error_dict["code"])
+    
+    return wrapper
+
+
+class SSETransport(TransportBase):
     """SSE transport implementation for MCP."""
     
     def __init__(self, protocol_handler: MCPProtocolHandler, host: str = "0.0.0.0", port: int = 5000):
@@ -24,9 +51,35 @@ class SSETransport(BaseTransport):
         super().__init__(protocol_handler)
         self.host = host
         self.port = port
+        self.refresh_descriptor()
+        
+        # One timer thread wakes every open event stream for keep-alives
+        self._keepalive = KeepaliveTicker()
+        self._streams = StreamLimiter(settings.server_max_streams)
+        
         self.flask_app = self._create_flask_app()
+        self._server = WSGIServer(self.flask_app, host, port)
         self._running = False
     
+    def refresh_descriptor(self) -> None:
+        """Build the tool descriptor and its serialized forms; call again if the descriptor changes."""
+        # Tool list with endpoint info for SSE transport
+        self._tool_descriptor = {
+            **get_tool_descriptor(),
+            "endpoint": {
+                "path": "/tools/call",
+                "method": "POST"
+            }
+        }
+        self._tool_name = self._tool_descriptor["name"]
+        self._tool_list_bytes = serialization.dumps_bytes([self._tool_descriptor])
+        
+        # Complete SSE frames replayed to every new stream
+        self._sse_frames = [
+            (tag, b"event: " + tag.encode() + b"\ndata: " + self._tool_list_bytes + b"\n\n")
+            for tag in ("tool_list", "tools")
+        ]
+    
     def _create_flask_app(self) -> Flask:
         """Create and configure Flask app."""
         app = Flask("ptsearch_sse")
@@ -36,83 +89,75 @@ class SSETransport(BaseTransport):
         @app.before_request
         def tag_request():
             g.request_id = logger.request_context()
-            logger.info(f"{request.method} {request.path}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"{request.method} {request.path}")
+        
+        # Worker threads are reused, so drop the request's log context when it ends
+        @app.teardown_request
+        def clear_request(exc):
+            logger.clear_context()
         
         # SSE events endpoint for tool registration
         @app.route("/events")
         def events():
-            def stream() -> Iterator[str]:
-                tool_descriptor = get_tool_descriptor()
-                
-                # Add endpoint info for SSE transport
-                if "endpoint" not in tool_descriptor:
-                    tool_descriptor["endpoint"] = {
-                        "path": "/tools/call",
-                        "method": "POST"
-                    }
-                
-                payload = json.dumps([tool_descriptor])
-                for tag in ("tool_list", "tools"):
-                    logger.debug(f"Sending event: {tag}")
-                    yield f"event: {tag}\ndata: {payload}\n\n"
+            # Every stream holds a worker thread until the client goes away
+            if not self._streams.acquire():
+                logger.warning("Rejecting event stream", limit=self._streams.limit)
+                return Response(
+                    "Too many open event streams",
+                    status=503,
+                    headers={"Retry-After": str(STREAM_RETRY_AFTER_SECONDS)},
+                )
+            
+            def stream() -> Iterator[bytes]:
+                for tag, frame in self._sse_frames:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Sending event: {tag}")
+                    yield frame
                 
-                # Keep-alive loop
-                n = 0
+                # Keep-alive loop; ends when the transport stops
+                tick = self._keepalive.tick
                 while True:
-                    n += 1
-                    time.sleep(15)
-                    yield f": ka-{n}\n\n"
+                    tick = self._keepalive.wait(tick)
+                    if tick is None:
+                        return
+                    yield KEEPALIVE_FRAME
             
-            return Response(
+            response = Response(
                 stream_with_context(stream()),
                 mimetype="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
                     "X-Accel-Buffering": "no",
-                    "Connection": "keep-alive",
                 },
             )
+            # Runs when the server closes the response, even if the stream never started
+            response.call_on_close(self._streams.release)
+            return response
         
         # Call handling endpoint
         @app.route("/tools/call", methods=["POST"])
+        @_json_endpoint
         def tools_call():
-            try:
-                body = request.get_json(force=True)
-                # Convert to MCP protocol message format for the handler
-                message = {
-                    "jsonrpc": "2.0",
-                    "id": "http-call",
-                    "method": "call_tool",
-                    "params": {
-                        "tool": body.get("tool"),
-                        "args": body.get("args", {})
-                    }
+            body = serialization.loads(request.get_data())
+            # Convert to MCP protocol message format for the handler
+            message = {
+                "jsonrpc": "2.0",
+                "id": "http-call",
+                "method": "call_tool",
+                "params": {
+                    "tool": body.get("tool"),
+                    "args": body.get("args", {})
                 }
-                
-                # Use the protocol handler to process the message
-                response_str = self.protocol_handler.process_message(json.dumps(message))
-                response = json.loads(response_str)
-                
-                if "error" in response:
-                    return jsonify({"error": response["error"]["message"]}), 400
-                
-                return jsonify(response["result"]["result"])
-            except Exception as e:
-                logger.exception(f"Error handling call: {e}")
-                error_dict = format_error(e)
-                return jsonify({"error": error_dict["error"]}), error_dict.get("code", 500)
+            }
+            
+            # Hand the message to the protocol handler without a JSON round trip
+            return self.protocol_handler.process_message_obj(message)
         
         # List tools endpoint
         @app.route("/tools/list", methods=["GET"])
         def tools_list():
-            tool_descriptor = get_tool_descriptor()
-            # Add endpoint info for SSE transport
-            if "endpoint" not in tool_descriptor:
-                tool_descriptor["endpoint"] = {
-                    "path": "/tools/call",
-                    "method": "POST"
-                }
-            return jsonify([tool_descriptor])
+            return Response(self._tool_list_bytes, mimetype="application/json")
         
         # Health check endpoint
         @app.route("/health", methods=["GET"])
@@ -121,33 +166,23 @@ class SSETransport(BaseTransport):
         
         # Direct search endpoint
         @app.route("/search", methods=["POST"])
+        @_json_endpoint
         def search():
-            try:
-                data = request.get_json(force=True)
-                
-                # Convert to MCP protocol message format for the handler
-                message = {
-                    "jsonrpc": "2.0",
-                    "id": "http-search",
-                    "method": "call_tool",
-                    "params": {
-                        "tool": get_tool_descriptor()["name"],
-                        "args": data
-                    }
+            data = serialization.loads(request.get_data())
+            
+            # Convert to MCP protocol message format for the handler
+            message = {
+                "jsonrpc": "2.0",
+                "id": "http-search",
+                "method": "call_tool",
+                "params": {
+                    "tool": self._tool_name,
+                    "args": data
                 }
-                
-                # Use the protocol handler to process the message
-                response_str = self.protocol_handler.process_message(json.dumps(message))
-                response = json.loads(response_str)
-                
-                if "error" in response:
-                    return jsonify({"error": response["error"]["message"]}), 400
-                
-                return jsonify(response["result"]["result"])
-            except Exception as e:
-                logger.exception(f"Error handling search: {e}")
-                error_dict = format_error(e)
-                return jsonify({"error": error_dict["error"]}), error_dict.get("code", 500)
+            }
+            
+            # Hand the message to the protocol handler without a JSON round trip
+            return self.protocol_handler.process_message_obj(message)
         
         return app
     
@@ -156,12 +191,11 @@ class SSETransport(BaseTransport):
         logger.info(f"Starting SSE transport on {self.host}:{self.port}")
         self._running = True
         
-        tool_name = get_tool_descriptor()["name"]
         logger.info(f"Tool registration command:")
-        logger.info(f"claude mcp add --transport sse {tool_name} http://{self.host}:{self.port}/events")
+        logger.info(f"claude mcp add --transport sse {self._tool_name} http://{self.host}:{self.port}/events")
         
         try:
-            self.flask_app.run(host=self.host, port=self.port, threaded=True)
+            self._server.serve()
         except Exception as e:
             logger.exception(f"Error in SSE transport: {e}")
             self._running = False
@@ -174,8 +208,8 @@ class SSETransport(BaseTransport):
         """Stop the transport."""
         logger.info("Stopping SSE transport")
         self._running = False
-        # Flask doesn't have a clean shutdown mechanism from inside
-        # This would normally be handled via signals from outside
+        self._keepalive.stop()
+        self._server.stop()
     
     @property
     def is_running(self) -> bool:
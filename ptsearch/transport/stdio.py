@@ -4,51 +4,78 @@ Handles MCP protocol over standard input/output.
 """
 
 import sys
-import signal
-from typing import Dict, Any, Optional
+import select
+import selectors
+from typing import Dict, Any, Optional, BinaryIO
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import TransportError
 from ptsearch.protocol import MCPProtocolHandler
-from ptsearch.transport.base import BaseTransport
+from ptsearch.transport.base import TransportBase
 
 
-class STDIOTransport(BaseTransport):
+class STDIOTransport(TransportBase):
     """STDIO transport implementation for MCP."""
     
+    # Bytes read from stdin per call, and buffered response bytes that force a flush
+    READ_SIZE = 1 << 20
+    FLUSH_THRESHOLD = 64 * 1024
+    
+    # Seconds between checks of the running flag while stdin is idle
+    POLL_INTERVAL = 0.5
+    
     def __init__(self, protocol_handler: MCPProtocolHandler):
         """Initialize STDIO transport."""
         super().__init__(protocol_handler)
         self._running = False
-        self._setup_signal_handlers()
-    
-    def _setup_signal_handlers(self):
-        """Set up signal handlers for graceful shutdown."""
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
-    
-    def _signal_handler(self, sig, frame):
-        """Handle termination signals."""
-        logger.info(f"Received signal {sig}, shutting down")
-        self.stop()
     
     def start(self):
         """Start processing messages from stdin."""
         logger.info("Starting STDIO transport")
         self._running = True
         
+        # Raw byte streams; messages stay UTF-8 bytes from stdin to stdout
+        reader = sys.stdin.buffer
+        writer = sys.stdout.buffer
+        
+        # One read buffer reused for every read; input accumulates in place until a
+        # line is complete, and responses are coalesced until no further input is waiting
+        scratch = memoryview(bytearray(self.READ_SIZE))
+        pending = bytearray()
+        out = bytearray()
+        
+        # Wait on stdin with a timeout so stop() from another thread is noticed
+        sel = self._make_selector(reader)
+        
         try:
             while self._running:
-                # Read a line from stdin
-                line = sys.stdin.readline()
-                if not line:
+                if sel is not None and not sel.select(self.POLL_INTERVAL):
+                    continue
+                
+                # Read whatever input is available
+                n = reader.readinto1(scratch)
+                if not n:
+                    if pending:
+                        out += self.protocol_handler.process_message_bytes(pending.strip())
+                        out += b"\n"
                     logger.info("End of input, shutting down")
                     break
+                pending += scratch[:n]
+                
+                # Process each complete line; an unterminated tail waits for more input
+                end = pending.rfind(b"\n")
+                if end < 0:
+                    continue
+                lines = pending[:end].split(b"\n")
+                del pending[:end + 1]
+                for line in lines:
+                    out += self.protocol_handler.process_message_bytes(line.strip())
+                    out += b"\n"
+                    if len(out) >= self.FLUSH_THRESHOLD:
+                        self._flush(writer, out)
                 
-                # Process the line and write response to stdout
-                response = self.protocol_handler.process_message(line.strip())
-                sys.stdout.write(response + "\n")
-                sys.stdout.flush()
+                if out and not self._input_pending(reader):
+                    self._flush(writer, out)
                 
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt, shutting down")
@@ -57,9 +84,41 @@ class STDIOTransport(BaseTransport):
             self._running = False
             raise TransportError(f"STDIO transport error: {e}")
         finally:
+            if out:
+                self._flush(writer, out)
+            if sel is not None:
+                sel.close()
             self._running = False
             logger.info("STDIO transport stopped")
     
+    @staticmethod
+    def _flush(writer: BinaryIO, out: bytearray) -> None:
+        """Write coalesced responses with one flush and empty the buffer."""
+        writer.write(out)
+        writer.flush()
+        out.clear()
+    
+    @staticmethod
+    def _make_selector(reader: BinaryIO) -> Optional[selectors.BaseSelector]:
+        """Register stdin for read events, or return None if it cannot be polled."""
+        sel = selectors.DefaultSelector()
+        try:
+            sel.register(reader, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            # Regular files and Windows pipes are read with blocking calls instead
+            sel.close()
+            return None
+        return sel
+    
+    @staticmethod
+    def _input_pending(reader: BinaryIO) -> bool:
+        """Check whether more input is already waiting on stdin."""
+        try:
+            return bool(select.select([reader], [], [], 0)[0])
+        except (OSError, ValueError):
+            # Stream cannot be polled (e.g. Windows pipes); flush every batch
+            return False
+    
     def stop(self):
         """Stop the transport."""
         logger.info("Stopping STDIO transport")
@@ -0,0 +1,66 @@
+"""
+WSGI server wrapper for PyTorch Documentation Search Tool.
+Serves Flask apps with waitress when it is installed, otherwise with
+Flask's development server.
+"""
+
+from typing import Dict, Any
+
+from flask import Flask
+
+from ptsearch.utils import logger
+from ptsearch.config import settings
+
+# waitress is optional; only the development server is available without it
+try:
+    from waitress import wasyncore
+    from waitress.server import create_server
+    from waitress.trigger import trigger
+except ImportError:
+    create_server = None
+
+
+class WSGIServer:
+    """Runs a Flask app until stopped.
+
+    Every open SSE stream holds one waitress worker thread, so the event
+    endpoints turn streams away past ``settings.server_max_streams``, which
+    leaves the rest of ``settings.server_threads`` free for tool calls.
+    """
+
+    def __init__(self, app: Flask, host: str, port: int):
+        """Initialize server for the app; nothing is bound until serve()."""
+        self.app = app
+        self.host = host
+        self.port = port
+        self._map: Dict[int, Any] = {}
+        self._server = None
+        self._trigger = None
+
+    def serve(self) -> None:
+        """Serve requests, blocking until stop() is called."""
+        if create_server is None:
+            logger.warning("waitress not installed, using the Flask development server")
+            self.app.run(host=self.host, port=self.port, threaded=True)
+            return
+
+        self._server = create_server(
+            self.app,
+            map=self._map,
+            host=self.host,
+            port=self.port,
+            threads=settings.server_threads,
+            connection_limit=settings.server_connection_limit
+        )
+        self._trigger = trigger(self._map)
+        logger.info(f"Serving with waitress", threads=settings.server_threads)
+        self._server.run()
+
+    def stop(self) -> None:
+        """Finish running requests, then close every socket from the server loop."""
+        if self._server is None:
+            return
+
+        # Open streams must already be released, or this waits for them
+        self._server.task_dispatcher.shutdown()
+        self._trigger.pull_trigger(lambda: wasyncore.close_all(self._map))
@@ -1,7 +1,37 @@
 """Compatibility utilities for handling API and library version differences."""
 
+from importlib.metadata import PackageNotFoundError, version
+from itertools import islice
+
 import numpy as np
 
-# Add monkey patch for NumPy 2.0+ compatibility with ChromaDB
-if not hasattr(np, 'float_'):
+# Importing this module applies the patch below; it exports nothing to star-imports
+__all__ = []
+
+# NumPy 2.0 removed np.float_, which older ChromaDB releases still reference.
+# Checking the module dict avoids NumPy's __getattr__ raising for removed names.
+if int(np.__version__.split(".", 1)[0]) >= 2 and "float_" not in vars(np):
     np.float_ = np.float64
+
+try:
+    from itertools import batched  # Python 3.12+
+except ImportError:
+    def batched(iterable, n):
+        """Yield successive tuples of up to ``n`` items from ``iterable``."""
+        iterator = iter(iterable)
+        while batch := tuple(islice(iterator, n)):
+            yield batch
+
+
+def _version_tuple(package: str) -> tuple:
+    """Return the installed version of ``package`` as a tuple of ints."""
+    try:
+        parts = version(package).split(".")[:3]
+    except PackageNotFoundError:
+        return ()
+    return tuple(int("".join(c for c in part if c.isdigit()) or 0) for part in parts)
+
+
+# ChromaDB accepts numpy arrays for embeddings without converting them to
+# Python floats from 0.6; older releases only accept lists
+CHROMA_ACCEPTS_NDARRAY = _version_tuple("chromadb") >= (0, 6)
@@ -13,17 +13,20 @@ class PTSearchError(Exception):
         self.message = message
         self.code = code
         self.details = details or {}
+        self._dict: Optional[Dict[str, Any]] = None
         super().__init__(self.message)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert error to dictionary for JSON serialization."""
-        result = {
-            "error": self.message,
-            "code": self.code
-        }
-        if self.details:
-            result["details"] = self.details
-        return result
+        """Convert error to dictionary for JSON serialization; callers get their own copy."""
+        if self._dict is None:
+            result = {
+                "error": self.message,
+                "code": self.code
+            }
+            if self.details:
+                result["details"] = self.details
+            self._dict = result
+        return dict(self._dict)
 
 
 class ConfigError(PTSearchError):
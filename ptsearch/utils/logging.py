@@ -3,12 +3,20 @@ Logging utilities for PyTorch Documentation Search Tool.
 Provides consistent structured logging with context tracking.
 """
 
-import json
+import itertools
 import logging
+import os
 import sys
 import time
-import uuid
-from typing import Dict, Any, Optional
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple
+
+from ptsearch.utils.serialization import dumps
+
+# Request IDs only need to be unique within a run, so a process-prefixed
+# counter replaces uuid4 and its urandom read; next() is atomic under the GIL
+_PID = os.getpid()
+_request_ids = itertools.count(1)
 
 class StructuredLogger:
     """Logger that provides structured, consistent logging with context."""
@@ -25,51 +33,76 @@ class StructuredLogger:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
         
-        # Request context
-        self.context: Dict[str, Any] = {}
+        # Request context per thread or task, paired with its JSON once encoded;
+        # set_context replaces the dict rather than mutating it
+        self._context: ContextVar[Tuple[Dict[str, Any], Optional[str]]] = ContextVar(
+            f"{name}_log_context", default=({}, None)
+        )
+    
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether messages at ``level`` would be emitted."""
+        return self.logger.isEnabledFor(level)
+    
+    @property
+    def context(self) -> Dict[str, Any]:
+        """Context values for the current thread or task."""
+        return self._context.get()[0]
     
     def set_context(self, **kwargs):
-        """Set context values to include in all log messages."""
-        self.context.update(kwargs)
+        """Set context values to include in log messages from the current thread or task."""
+        context, _ = self._context.get()
+        self._context.set(({**context, **kwargs}, None))
+    
+    def clear_context(self):
+        """Drop all context values for the current thread or task."""
+        self._context.set(({}, None))
     
     def _format_message(self, message: str, extra: Optional[Dict[str, Any]] = None) -> str:
         """Format message with context and extra data."""
-        log_data = {**self.context}
-        
+        context, context_json = self._context.get()
         if extra:
-            log_data.update(extra)
+            return f"{message} {dumps({**context, **extra})}"
         
-        if log_data:
-            return f"{message} {json.dumps(log_data)}"
-        return message
+        if not context:
+            return message
+        if context_json is None:
+            context_json = dumps(context)
+            self._context.set((context, context_json))
+        return f"{message} {context_json}"
     
     def debug(self, message: str, **kwargs):
         """Log debug message with context."""
-        self.logger.debug(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self._format_message(message, kwargs))
     
     def info(self, message: str, **kwargs):
         """Log info message with context."""
-        self.logger.info(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(self._format_message(message, kwargs))
     
     def warning(self, message: str, **kwargs):
         """Log warning message with context."""
-        self.logger.warning(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(self._format_message(message, kwargs))
     
     def error(self, message: str, **kwargs):
         """Log error message with context."""
-        self.logger.error(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(self._format_message(message, kwargs))
     
     def critical(self, message: str, **kwargs):
         """Log critical message with context."""
-        self.logger.critical(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.critical(self._format_message(message, kwargs))
     
     def exception(self, message: str, **kwargs):
         """Log exception message with context and traceback."""
-        self.logger.exception(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.exception(self._format_message(message, kwargs))
     
     def request_context(self, request_id: Optional[str] = None):
         """Create a new request context with unique ID."""
-        req_id = request_id or str(uuid.uuid4())
+        req_id = request_id or f"{_PID:x}-{next(_request_ids):x}"
         self.set_context(request_id=req_id, timestamp=time.time())
         return req_id
 
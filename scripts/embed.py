@@ -11,15 +11,14 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ptsearch.embedding import EmbeddingGenerator
-from ptsearch.config import DEFAULT_CHUNKS_PATH, DEFAULT_EMBEDDINGS_PATH
+from ptsearch.config import settings
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Generate embeddings for document chunks")
-    parser.add_argument("--input-file", type=str, default=DEFAULT_CHUNKS_PATH,
+    parser.add_argument("--input-file", type=str, default=settings.default_chunks_path,
                       help="Input JSON file with document chunks")
-    parser.add_argument("--output-file", type=str, default=DEFAULT_EMBEDDINGS_PATH,
+    parser.add_argument("--output-file", type=str, default=settings.default_embeddings_path,
                       help="Output JSON file to save chunks with embeddings")
     parser.add_argument("--batch-size", type=int, default=20,
                       help="Batch size for embedding generation")
@@ -27,11 +26,14 @@ def main():
                       help="Disable embedding cache")
     args = parser.parse_args()
     
-    # Create generator and process embeddings
-    generator = EmbeddingGenerator(use_cache=not args.no_cache)
-    chunks = generator.process_file(args.input_file, args.output_file)
+    # Import the embedding stack only once arguments are valid
+    from ptsearch.core.embedding import EmbeddingGenerator
     
-    print(f"Embedding generation complete! Processed {len(chunks)} chunks")
+    # Stream chunks through the generator; closing it flushes pending cache writes
+    with EmbeddingGenerator(use_cache=not args.no_cache) as generator:
+        count = generator.process_file(args.input_file, args.output_file, args.batch_size)
+    
+    print(f"Embedding generation complete! Processed {count} chunks")
     print(f"Embeddings saved to {args.output_file}")
 
 if __name__ == "__main__":
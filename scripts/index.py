@@ -11,13 +11,13 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ptsearch.database import DatabaseManager
-from ptsearch.config import DEFAULT_EMBEDDINGS_PATH
+from ptsearch.core.database import open_database
+from ptsearch.config import settings
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Index chunks into database")
-    parser.add_argument("--input-file", type=str, default=DEFAULT_EMBEDDINGS_PATH,
+    parser.add_argument("--input-file", type=str, default=settings.default_embeddings_path,
                       help="Input JSON file with chunks and embeddings")
     parser.add_argument("--batch-size", type=int, default=50,
                       help="Batch size for database operations")
@@ -28,7 +28,7 @@ def main():
     args = parser.parse_args()
     
     # Initialize database manager
-    db_manager = DatabaseManager()
+    db_manager = open_database()
     
     # Load chunks into database
     db_manager.load_from_file(
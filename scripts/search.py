@@ -12,11 +12,14 @@ import argparse
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ptsearch.core.database import DatabaseManager
-from ptsearch.core.embedding import EmbeddingGenerator
-from ptsearch.core.search import SearchEngine
 from ptsearch.config.settings import settings
 
+
+def get_engine():
+    """Import the search stack and build the engine only when a search runs."""
+    from ptsearch.core import get_engine
+    return get_engine()
+
 def main():
     # Parse arguments
     parser = argparse.ArgumentParser(description='Search PyTorch documentation')
@@ -27,13 +30,9 @@ def main():
     parser.add_argument('--json', '-j', action='store_true', help='Output results as JSON')
     args = parser.parse_args()
     
-    # Initialize components
-    db_manager = DatabaseManager()
-    embedding_generator = EmbeddingGenerator()
-    search_engine = SearchEngine(db_manager, embedding_generator)
-    
     if args.interactive:
         # Interactive mode
+        search_engine = get_engine()
         print("PyTorch Documentation Search (type 'exit' to quit)")
         while True:
             query = input("\nEnter search query: ")
@@ -56,7 +55,7 @@ def main():
     
     elif args.query:
         # Direct query mode
-        results = search_engine.search(args.query, args.results, args.filter)
+        results = get_engine().search(args.query, args.results, args.filter)
         
         if args.json:
             print(json.dumps(results, indent=2))
@@ -74,7 +73,7 @@ def main():
         # Read from stdin (for Claude Code tool integration)
         query = sys.stdin.read().strip()
         if query:
-            results = search_engine.search(query, args.results)
+            results = get_engine().search(query, args.results)
             print(json.dumps(results))
         else:
             print(json.dumps({"error": "No query provided", "results": []}))
@@ -9,15 +9,12 @@ import sys
 import json
 import logging
 import time
-from flask import Flask, Response, request, jsonify, stream_with_context, g, abort
+from flask import Flask, Response, request, stream_with_context, g, abort
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ptsearch.database import DatabaseManager
-from ptsearch.embedding import EmbeddingGenerator
-from ptsearch.search import SearchEngine
-from ptsearch.config import MAX_RESULTS, logger
+from ptsearch.utils import logger, serialization
 
 # Tool descriptor for MCP
 TOOL_NAME = "search_pytorch_docs"
@@ -45,21 +42,29 @@ TOOL_DESCRIPTOR = {
 app = Flask(__name__)
 seq = 0
 
-# Initialize search components
-db_manager = DatabaseManager()
-embedding_generator = EmbeddingGenerator()
-search_engine = SearchEngine(db_manager, embedding_generator)
+
+def json_response(obj, status=200):
+    """Build a JSON response without going through Flask's stdlib encoder."""
+    return Response(serialization.dumps_bytes(obj), status=status, mimetype="application/json")
+
+
+def get_engine():
+    """Import the search stack and build the shared engine on first search."""
+    from ptsearch.core import get_engine
+    return get_engine()
 
 @app.before_request
 def tag_request():
     global seq
     g.cid = f"c{int(time.time())}-{seq}"
     seq += 1
-    logger.info("[%s] %s %s", g.cid, request.method, request.path)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"[{g.cid}] {request.method} {request.path}")
 
 @app.after_request
 def log_response(resp):
-    logger.info("[%s] → %s", g.cid, resp.status)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"[{g.cid}] → {resp.status}")
     return resp
 
 # SSE events endpoint for tool registration
@@ -70,7 +75,8 @@ def events():
     def stream():
         payload = json.dumps([TOOL_DESCRIPTOR])
         for tag in ("tool_list", "tools"):
-            logger.debug("[%s] send %s", cid, tag)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"[{cid}] send {tag}")
             yield f"event: {tag}\ndata: {payload}\n\n"
         n = 0
         while True:
@@ -104,27 +110,26 @@ def handle_call(body):
     n = int(args.get("num_results", 5))
     filter_type = args.get("filter")
     
-    return search_engine.search(query, n, filter_type)
+    return get_engine().search(query, n, filter_type)
 
-# Register endpoints for various call paths
+def call_tool():
+    return json_response(handle_call(request.get_json(force=True)))
+
+# Register one view for the various call paths
 for path in ("/tools/call", "/call", "/invoke", "/run"):
-    app.add_url_rule(
-        path,
-        path,
-        lambda path=path: jsonify(handle_call(request.get_json(force=True))),
-        methods=["POST"],
-    )
+    app.add_url_rule(path, path, call_tool, methods=["POST"])
 
 # Catch-all for unknown routes
 @app.route("/<path:path>", methods=["GET", "POST", "PUT", "DELETE"])
 def catch_all(path):
-    logger.warning("[%s] catch-all: %s", g.cid, path)
-    return jsonify({"error": "no such endpoint", "path": path}), 404
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning(f"[{g.cid}] catch-all: {path}")
+    return json_response({"error": "no such endpoint", "path": path}, 404)
 
 # List tools
 @app.route("/tools/list")
 def list_tools():
-    return jsonify([TOOL_DESCRIPTOR])
+    return json_response([TOOL_DESCRIPTOR])
 
 # Health check
 @app.route("/health")
@@ -139,7 +144,7 @@ def search():
     n = int(data.get("num_results", 5))
     filter_type = data.get("filter")
     
-    return jsonify(search_engine.search(query, n, filter_type))
+    return json_response(get_engine().search(query, n, filter_type))
 
 if __name__ == "__main__":
     print("Starting PyTorch Documentation Search Server")
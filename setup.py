@@ -1,20 +1,48 @@
 # setup.py
+import os
+
 from setuptools import setup, find_packages
 
+# Optionally compile the result formatter's hot paths to C with mypyc.
+# Build with PTSEARCH_MYPYC=1 (requires mypy); the pure-Python module is used otherwise.
+ext_modules = []
+if os.environ.get("PTSEARCH_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["--follow-imports=silent", "ptsearch/core/formatter.py"])
+
 setup(
     name="mcp-server-pytorch",
     version="0.1.0",
     packages=find_packages(),
+    ext_modules=ext_modules,
     install_requires=[
         "flask>=2.2.3",
         "openai>=1.2.4",
         "chromadb>=0.4.18",
+        "ijson>=3.1",
+        "numpy>=1.24",
         "tree-sitter>=0.20.1",
         "tree-sitter-languages>=1.7.0",
         "python-dotenv>=1.0.0",
         "flask-cors>=3.0.10",
         "mcp>=1.1.3"
     ],
+    extras_require={
+        "speedups": [
+            "blake3>=0.3",
+            "numba>=0.57",
+            "orjson>=3.9",
+        ],
+        "faiss": [
+            "faiss-cpu>=1.7.4",
+        ],
+        "server": [
+            "waitress>=2.1",
+        ],
+        "test": [
+            "pytest>=7",
+        ],
+    },
     entry_points={
         'console_scripts': [
             'mcp-server-pytorch=mcp_server_pytorch:main',
@@ -0,0 +1,98 @@
+"""Shared fixtures: deterministic embeddings in place of OpenAI API calls."""
+
+import hashlib
+import types
+import weakref
+
+import numpy as np
+import pytest
+
+from ptsearch.config import settings
+
+
+def fake_vector(text: str) -> np.ndarray:
+    """Unit vector derived from the text, so equal texts embed equally."""
+    seed = int.from_bytes(hashlib.md5(text.encode()).digest()[:4], "little")
+    vector = np.random.default_rng(seed).standard_normal(settings.embedding_dimensions)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+class FakeEmbeddings:
+    """Stands in for ``client.embeddings`` and counts requests."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, input, model):
+        self.calls += 1
+        texts = [input] if isinstance(input, str) else input
+        return types.SimpleNamespace(
+            data=[types.SimpleNamespace(embedding=fake_vector(text).tolist()) for text in texts]
+        )
+
+
+class FakeAsyncClient:
+    """Stands in for ``AsyncOpenAI`` inside ``async with``."""
+
+    def __init__(self, embeddings: FakeEmbeddings):
+        self._embeddings = embeddings
+        self.embeddings = self
+
+    async def create(self, input, model):
+        return self._embeddings.create(input, model)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+@pytest.fixture
+def make_generator(tmp_path):
+    """Build EmbeddingGenerators whose API calls go to a FakeEmbeddings."""
+    from ptsearch.core.embedding import EmbeddingGenerator
+
+    generators = []
+
+    def make(**kwargs):
+        kwargs.setdefault("cache_dir", str(tmp_path / "embedding_cache"))
+        generator = EmbeddingGenerator(api_key="test-key", **kwargs)
+        embeddings = FakeEmbeddings()
+        generator.client = types.SimpleNamespace(embeddings=embeddings)
+        generator._create_async_client = lambda: FakeAsyncClient(embeddings)
+        generator.fake = embeddings
+        generators.append(weakref.ref(generator))
+        return generator
+
+    yield make
+    for ref in generators:
+        generator = ref()
+        if generator is not None:
+            generator.close()
+
+
+def make_chunks(count: int):
+    """Chunks alternating between code and text, embedded with fake_vector."""
+    return [
+        {
+            "id": f"c{i}",
+            "text": f"doc {i}",
+            "embedding": fake_vector(f"doc {i}").tolist(),
+            "metadata": {"chunk_type": "code" if i % 2 else "text", "title": f"T{i}"},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def engine(tmp_path, make_generator, monkeypatch):
+    """A SearchEngine over a small Chroma collection, installed as the shared engine."""
+    from ptsearch.core import search
+    from ptsearch.core.database import DatabaseManager
+
+    database = DatabaseManager(str(tmp_path / "chroma_db"), "test_docs")
+    database.add_chunks(make_chunks(30))
+    engine = search.SearchEngine(database, make_generator())
+    monkeypatch.setattr(search, "_engine", engine)
+    return engine
@@ -0,0 +1,107 @@
+"""Tests for batched searches through the engine, the server and the protocol handler."""
+
+import asyncio
+
+from ptsearch import server
+from ptsearch.config import settings
+from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.utils import serialization
+
+
+def test_search_many_matches_single_searches(engine):
+    queries = ["doc 3", "doc 5", "doc 8"]
+    batched = engine.search_many(queries, 3)
+    engine.clear_cache()
+
+    for query, result in zip(queries, batched):
+        single = engine.search(query, 3)
+        assert [hit["title"] for hit in result["results"]] == [hit["title"] for hit in single["results"]]
+    assert batched[0]["results"][0]["title"] == "T3"
+
+
+def test_search_many_embeds_uncached_queries_in_one_request(engine):
+    engine.search("doc 3", 3)
+    engine.embedder.fake.calls = 0
+
+    results = engine.search_many(["doc 3", "doc 5", "doc 7"], 3)
+
+    assert engine.embedder.fake.calls == 1
+    assert [r["results"][0]["title"] for r in results] == ["T3", "T5", "T7"]
+
+
+def test_search_many_applies_filter(engine):
+    for result in engine.search_many(["doc 4", "doc 6"], 2, "code"):
+        assert {hit["chunk_type"] for hit in result["results"]} == {"code"}
+
+
+def test_search_many_inside_running_event_loop(engine):
+    async def search():
+        return engine.search_many(["doc 9"], 1)
+
+    assert asyncio.run(search())[0]["results"][0]["title"] == "T9"
+
+
+def test_batch_search_handler_groups_calls(engine):
+    results = server.batch_search_handler([
+        {"query": "doc 9"},
+        {"query": "echo:ping"},
+        {"query": "doc 11", "num_results": 1, "filter": "code"},
+    ])
+
+    assert results[0]["results"][0]["title"] == "T9"
+    assert results[1] == {"ok": True}
+    assert [hit["title"] for hit in results[2]["results"]] == ["T11"]
+
+
+def test_protocol_call_tool_batch(engine):
+    handler = MCPProtocolHandler(server.search_handler, server.batch_search_handler)
+    response = handler.process_message_obj({
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "call_tool_batch",
+        "params": {"tool": settings.tool_name, "calls": [{"query": "echo:ping"}, {"query": "doc 2"}]},
+    })
+
+    results = response["result"]["results"]
+    assert results[0] == {"ok": True}
+    assert results[1]["results"][0]["title"] == "T2"
+
+
+def test_protocol_call_tool_batch_without_batch_handler():
+    handler = MCPProtocolHandler(server.search_handler)
+    response = handler.process_message_obj({
+        "id": 1,
+        "method": "call_tool_batch",
+        "params": {"tool": settings.tool_name, "calls": [{"query": "echo:ping"}]},
+    })
+
+    assert response["result"] == {"results": [{"ok": True}]}
+
+
+def test_protocol_call_tool_batch_rejects_bad_calls():
+    handler = MCPProtocolHandler(server.search_handler)
+    response = handler.process_message_obj({
+        "id": 1,
+        "method": "call_tool_batch",
+        "params": {"tool": settings.tool_name, "calls": {"query": "x"}},
+    })
+
+    assert response["error"]["code"] == -32602
+
+
+def test_call_batch_endpoint(engine):
+    client = server.create_flask_app().test_client()
+    response = client.post("/tools/call_batch", json={
+        "tool": settings.tool_name,
+        "calls": [{"query": "doc 1"}, {"query": "echo:ping"}],
+    })
+
+    assert response.status_code == 200
+    results = serialization.loads(response.get_data())
+    assert results[0]["results"][0]["title"] == "T1"
+    assert results[1] == {"ok": True}
+
+
+def test_call_batch_endpoint_rejects_unknown_tool():
+    client = server.create_flask_app().test_client()
+    assert client.post("/tools/call_batch", json={"tool": "nope"}).status_code == 400
@@ -0,0 +1,173 @@
+"""Tests for the binary embedding cache."""
+
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from ptsearch.core.cache import BinaryEmbeddingCache
+
+DIM = 16
+
+
+def _vector(seed: int, dim: int = DIM) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def _key(i: int) -> bytes:
+    return i.to_bytes(16, "little")
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "cache")
+
+
+@pytest.mark.parametrize("dtype, atol", [("float32", 0.0), ("float16", 1e-2), ("int8", 3e-2)])
+def test_round_trip(cache_dir, dtype, atol):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, dtype)
+    vectors = {_key(i): _vector(i) for i in range(5)}
+    cache.put_many(vectors.items())
+
+    keys = [*vectors, _key(99)]
+    found = cache.get_many(keys)
+
+    assert found[-1] is None
+    for key, vector in zip(keys, found):
+        if key in vectors:
+            assert vector.dtype == np.float32
+            np.testing.assert_allclose(vector, vectors[key], atol=atol)
+    assert len(cache) == 5
+    cache.close()
+
+
+def test_get_returns_copies(cache_dir):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float32")
+    cache.put(_key(1), _vector(1))
+    cache.get(_key(1))[:] = 0
+    np.testing.assert_array_equal(cache.get(_key(1)), _vector(1))
+    cache.close()
+
+
+def test_reopen_keeps_entries(cache_dir):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float16")
+    cache.put(_key(1), _vector(1))
+    cache.close()
+
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float16")
+    np.testing.assert_allclose(cache.get(_key(1)), _vector(1), atol=1e-2)
+    cache.close()
+
+
+@pytest.mark.skipif(not hasattr(sqlite3.Connection, "setlimit"), reason="needs Python 3.11+")
+def test_large_batches_stay_below_parameter_limit(cache_dir):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 30, "float32")
+    # Match the 999-variable limit of older SQLite builds
+    cache._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    items = [(_key(i), np.full(2, i, dtype=np.float32)) for i in range(2000)]
+    cache.put_many(items)
+    # Replacing every key exercises the replaced-size lookup as well
+    cache.put_many(items)
+
+    assert len(cache) == 2000
+    assert cache.get_many([key for key, _ in items])[1999][0] == 1999
+    cache.close()
+
+
+def test_evict_drops_least_recently_used(cache_dir):
+    entry_bytes = DIM * 4
+    cache = BinaryEmbeddingCache(cache_dir, 3 * entry_bytes, "float32")
+    for i in range(4):
+        cache.put(_key(i), _vector(i))
+    # Reading key 0 makes key 1 the oldest entry
+    cache.get(_key(0))
+
+    cache.evict()
+
+    assert len(cache) == 3
+    assert cache.get(_key(1)) is None
+    assert cache.get(_key(0)) is not None
+    cache.close()
+
+
+def test_compact_rewrites_vector_file(cache_dir):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float32", compact_threshold=0.3)
+    for i in range(4):
+        cache.put(_key(i), _vector(i))
+    # Replacing half the entries leaves half the file as holes
+    cache.put_many([(_key(0), _vector(10)), (_key(1), _vector(11))])
+    old_path = cache.vector_path
+
+    cache.evict()
+
+    assert cache.vector_path != old_path
+    assert not os.path.exists(old_path)
+    assert os.path.getsize(cache.vector_path) == 4 * DIM * 4
+    np.testing.assert_array_equal(cache.get(_key(0)), _vector(10))
+    np.testing.assert_array_equal(cache.get(_key(3)), _vector(3))
+    cache.close()
+
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float32")
+    np.testing.assert_array_equal(cache.get(_key(1)), _vector(11))
+    cache.close()
+
+
+def test_truncated_vector_file_drops_entries(cache_dir):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float32")
+    cache.put(_key(1), _vector(1))
+    cache.put(_key(2), _vector(2))
+    path = cache.vector_path
+    cache.close()
+
+    with open(path, "r+b") as f:
+        f.truncate(DIM * 4 + 4)
+
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float32")
+    assert len(cache) == 1
+    np.testing.assert_array_equal(cache.get(_key(1)), _vector(1))
+    assert cache.get(_key(2)) is None
+    cache.close()
+
+
+def test_dtype_change_resets_cache(cache_dir):
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "float32")
+    cache.put(_key(1), _vector(1))
+    cache.close()
+
+    cache = BinaryEmbeddingCache(cache_dir, 1 << 20, "int8")
+    assert len(cache) == 0
+    assert cache.get(_key(1)) is None
+    cache.close()
+
+
+def test_unsupported_dtype_is_rejected(cache_dir):
+    with pytest.raises(ValueError):
+        BinaryEmbeddingCache(cache_dir, 1 << 20, "float64")
+
+
+def test_only_legacy_entries_are_removed(cache_dir):
+    os.makedirs(cache_dir)
+    legacy = os.path.join(cache_dir, "a" * 64 + ".json")
+    unrelated = os.path.join(cache_dir, "b" * 64 + ".json")
+    with open(legacy, "w") as f:
+        json.dump({"text_preview": "x", "model": "m", "embedding": [0.0], "timestamp": 0}, f)
+    with open(unrelated, "w") as f:
+        json.dump({"chunks": []}, f)
+
+    BinaryEmbeddingCache(cache_dir, 1 << 20).close()
+
+    assert not os.path.exists(legacy)
+    assert os.path.exists(unrelated)
+
+
+def test_existing_cache_does_not_scan_for_legacy_entries(cache_dir):
+    BinaryEmbeddingCache(cache_dir, 1 << 20).close()
+    legacy = os.path.join(cache_dir, "c" * 64 + ".json")
+    with open(legacy, "w") as f:
+        json.dump({"text_preview": "x", "model": "m", "embedding": [0.0], "timestamp": 0}, f)
+
+    BinaryEmbeddingCache(cache_dir, 1 << 20).close()
+
+    assert os.path.exists(legacy)
@@ -0,0 +1,56 @@
+"""Tests for embedding generation and its cache write buffering."""
+
+import gc
+import time
+import weakref
+
+import numpy as np
+
+from ptsearch.core.cache import BinaryEmbeddingCache
+from ptsearch.core.embedding import _CacheWriter
+
+from conftest import fake_vector
+
+
+def test_embeddings_are_cached_across_generators(make_generator):
+    first = make_generator()
+    np.testing.assert_array_equal(first.generate_embedding("torch.nn"), fake_vector("torch.nn"))
+    first.close()
+
+    second = make_generator()
+    second.generate_embedding("torch.nn")
+    assert second.fake.calls == 0
+
+
+def test_batch_requests_each_distinct_text_once(make_generator):
+    generator = make_generator(use_cache=False)
+    embeddings = generator.generate_embeddings(["a", "b", "a", ""], batch_size=10)
+
+    assert generator.fake.calls == 1
+    np.testing.assert_array_equal(embeddings[2], fake_vector("a"))
+    assert not embeddings[3].any()
+
+
+def test_pending_write_is_flushed_after_delay(make_generator, monkeypatch):
+    monkeypatch.setattr(_CacheWriter, "PENDING_WRITES_MAX_AGE", 0.05)
+    generator = make_generator()
+    generator.generate_embedding("query")
+
+    deadline = time.monotonic() + 5
+    while len(generator.cache) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(generator.cache) == 1
+
+
+def test_collected_generator_writes_pending_entries(make_generator, tmp_path):
+    generator = make_generator()
+    generator.generate_embedding("query")
+    ref = weakref.ref(generator)
+
+    del generator
+    gc.collect()
+
+    assert ref() is None
+    cache = BinaryEmbeddingCache(str(tmp_path / "embedding_cache"), 1 << 30)
+    assert len(cache) == 1
+    cache.close()
@@ -0,0 +1,101 @@
+"""Tests for the FAISS vector store."""
+
+import numpy as np
+import pytest
+
+from ptsearch.config import settings
+from ptsearch.utils.error import DatabaseError
+
+pytest.importorskip("faiss")
+
+from ptsearch.core.faiss_backend import FaissBackend  # noqa: E402
+
+DIM = 8
+
+
+def _vector(i: int) -> list:
+    return np.random.default_rng(i).standard_normal(DIM).tolist()
+
+
+def _chunks(start: int, count: int) -> list:
+    return [
+        {
+            "id": f"c{i}",
+            "text": f"doc {i}",
+            "embedding": _vector(i),
+            "metadata": {"chunk_type": "code" if i % 2 else "text"},
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "embedding_dimensions", DIM)
+    monkeypatch.setattr(settings, "faiss_nlist", 2)
+    monkeypatch.setattr(settings, "faiss_nprobe", 2)
+    return FaissBackend(str(tmp_path), "test_docs")
+
+
+def test_query_returns_nearest_chunk(backend):
+    backend.add_chunks(_chunks(0, 10))
+
+    result = backend.query(_vector(4), n_results=3)
+
+    assert result["ids"][0][0] == "c4"
+    assert result["documents"][0][0] == "doc 4"
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert len(result["ids"][0]) == 3
+
+
+def test_query_applies_equality_filters(backend):
+    backend.add_chunks(_chunks(0, 10))
+
+    result = backend.query(_vector(4), n_results=3, filters={"chunk_type": "code"})
+
+    assert len(result["ids"][0]) == 3
+    assert all(metadata["chunk_type"] == "code" for metadata in result["metadatas"][0])
+
+
+def test_query_many_answers_each_embedding(backend):
+    backend.add_chunks(_chunks(0, 10))
+
+    results = backend.query_many([_vector(2), _vector(7)], n_results=1)
+
+    assert [result["ids"][0] for result in results] == [["c2"], ["c7"]]
+
+
+def test_switches_to_ivf_once_enough_vectors(backend):
+    threshold = settings.faiss_nlist * FaissBackend.TRAIN_POINTS_PER_LIST
+    backend.add_chunks(_chunks(0, threshold - 1))
+    assert backend.get_stats()["index_type"] == "IndexFlatIP"
+
+    backend.add_chunks(_chunks(threshold - 1, 1))
+
+    assert backend.get_stats()["index_type"] == "IndexIVFFlat"
+    assert backend.query(_vector(5), n_results=1)["ids"][0] == ["c5"]
+
+
+def test_index_persists_across_reopen(backend, tmp_path):
+    backend.add_chunks(_chunks(0, 5))
+
+    reopened = FaissBackend(str(tmp_path), "test_docs")
+
+    assert reopened.get_stats()["total_chunks"] == 5
+    assert reopened.query(_vector(3), n_results=1)["ids"][0] == ["c3"]
+
+
+def test_rejected_batch_stores_no_rows(backend, tmp_path, monkeypatch):
+    backend.add_chunks(_chunks(0, 5))
+
+    # An index built for other dimensions rejects the vectors
+    monkeypatch.setattr(settings, "embedding_dimensions", DIM * 2)
+    with pytest.raises(DatabaseError):
+        backend.add_chunks(_chunks(5, 3))
+    monkeypatch.setattr(settings, "embedding_dimensions", DIM)
+
+    assert backend._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 5
+
+    # Later batches stay aligned with their index positions
+    backend.add_chunks(_chunks(10, 2))
+    assert backend.query(_vector(11), n_results=1)["ids"][0] == ["c11"]
@@ -0,0 +1,52 @@
+"""Tests for result formatting and ranking."""
+
+from ptsearch.core.formatter import ResultFormatter
+
+
+def _raw(rows):
+    """Nested Chroma-style results from (title, chunk_type, distance) rows."""
+    return {
+        "ids": [[f"c{i}" for i in range(len(rows))]],
+        "documents": [[f"doc {title}" for title, _, _ in rows]],
+        "metadatas": [[{"title": title, "chunk_type": chunk_type} for title, chunk_type, _ in rows]],
+        "distances": [[distance for _, _, distance in rows]],
+    }
+
+
+ROWS = [("A", "text", 0.10), ("B", "text", 0.20), ("C", "code", 0.22), ("D", "text", 0.30)]
+
+
+def test_rank_results_boosts_matching_type():
+    formatter = ResultFormatter("nested")
+    results = formatter.rank_results(formatter.format_results(_raw(ROWS), "q"), is_code_query=True)
+
+    assert [hit.title for hit in results["results"]] == ["C", "A", "B", "D"]
+    assert results["results"][0].match_reason is not None
+    assert results["count"] == 4
+
+
+def test_top_k_keeps_best_hits_and_updates_count():
+    formatter = ResultFormatter("nested")
+    results = formatter.rank_results(formatter.format_results(_raw(ROWS), "q"), True, top_k=2)
+
+    # C was only third-closest in the database but ranks first after boosting
+    assert [hit.title for hit in results["results"]] == ["C", "A"]
+    assert results["count"] == 2
+
+
+def test_top_k_matches_full_sort_including_ties():
+    formatter = ResultFormatter("nested")
+    rows = [(str(i), "text", 0.5 if i % 3 else 0.2) for i in range(12)]
+
+    full = formatter.rank_results(formatter.format_results(_raw(rows), "q"), False)
+    top = formatter.rank_results(formatter.format_results(_raw(rows), "q"), False, top_k=5)
+
+    assert [hit.title for hit in top["results"]] == [hit.title for hit in full["results"][:5]]
+
+
+def test_engine_returns_requested_count_from_extra_candidates(engine):
+    results = engine.search("doc 3", 3)
+
+    assert len(results["results"]) == 3
+    assert results["count"] == 3
+    assert results["metadata"]["result_count"] == 3
@@ -0,0 +1,82 @@
+"""Tests for streamed searches through the engine and the /search_stream endpoint."""
+
+from ptsearch import server
+from ptsearch.utils import serialization
+from ptsearch.utils.error import SearchError
+
+
+def _events(response) -> list:
+    body = response.get_data()
+    assert response.mimetype == "application/x-ndjson"
+    assert body.endswith(b"\n")
+    return [serialization.loads(line) for line in body.split(b"\n")[:-1]]
+
+
+def test_search_stream_matches_search(engine):
+    events = list(engine.search_stream("doc 7", 4))
+    engine.clear_cache()
+    expected = engine.search("doc 7", 4)
+
+    assert [e["event"] for e in events] == ["hit"] * 4 + ["end"]
+    assert [e["title"] for e in events[:-1]] == [hit["title"] for hit in expected["results"]]
+    assert events[-1]["metadata"]["result_count"] == 4
+
+
+def test_search_stream_yields_before_ranking_finishes(engine):
+    stream = engine.search_stream("doc 3", 5)
+
+    assert next(stream)["title"] == "T3"
+    stream.close()
+
+
+def test_search_stream_serves_cached_results(engine):
+    first = list(engine.search_stream("doc 5", 3))
+    engine.embedder.fake.calls = 0
+
+    second = list(engine.search_stream("doc 5", 3))
+
+    assert engine.embedder.fake.calls == 0
+    assert [e.get("title") for e in second] == [e.get("title") for e in first]
+
+
+def test_endpoint_frames_start_hits_and_end(engine):
+    client = server.create_flask_app().test_client()
+    events = _events(client.post("/search_stream", json={"query": "doc 9", "num_results": 3}))
+
+    assert events[0] == {"event": "start", "query": "doc 9"}
+    assert [e["event"] for e in events[1:]] == ["hit"] * 3 + ["end"]
+    assert events[1]["title"] == "T9"
+    assert events[-1]["metadata"]["result_count"] == 3
+
+
+def test_endpoint_applies_filter(engine):
+    client = server.create_flask_app().test_client()
+    events = _events(client.post("/search_stream", json={"query": "doc 4", "num_results": 2, "filter": "code"}))
+
+    assert {e["chunk_type"] for e in events if e["event"] == "hit"} == {"code"}
+
+
+def test_endpoint_echo_ping():
+    client = server.create_flask_app().test_client()
+    events = _events(client.post("/search_stream", json={"query": "echo:ping"}))
+
+    assert [e["event"] for e in events] == ["start", "end"]
+
+
+def test_endpoint_reports_errors_as_events(engine, monkeypatch):
+    def fail(*args, **kwargs):
+        raise SearchError("boom")
+
+    monkeypatch.setattr(engine, "search_stream", fail)
+    client = server.create_flask_app().test_client()
+    events = _events(client.post("/search_stream", json={"query": "doc 1"}))
+
+    assert [e["event"] for e in events] == ["start", "error"]
+    assert "boom" in events[1]["error"]
+
+
+def test_endpoint_rejects_invalid_json():
+    client = server.create_flask_app().test_client()
+    response = client.post("/search_stream", data=b"not json", content_type="application/json")
+
+    assert response.status_code == 400
@@ -0,0 +1,28 @@
+"""Tests for environment overrides in ptsearch.config.settings."""
+
+from ptsearch.config.settings import Settings
+
+
+def test_env_overrides_are_coerced_to_field_types(monkeypatch):
+    monkeypatch.setenv("PTSEARCH_MAX_RESULTS", "7")
+    monkeypatch.setenv("PTSEARCH_MAX_CACHE_SIZE_GB", "0.5")
+    monkeypatch.setenv("PTSEARCH_DEBUG_TIMINGS", "yes")
+    monkeypatch.setenv("PTSEARCH_COLLECTION_NAME", "other_docs")
+
+    s = Settings()
+
+    assert s.max_results == 7 and type(s.max_results) is int
+    assert s.max_cache_size_gb == 0.5 and type(s.max_cache_size_gb) is float
+    assert s.debug_timings is True
+    assert s.collection_name == "other_docs"
+
+
+def test_bool_override_accepts_only_true_spellings(monkeypatch):
+    for value, expected in (("1", True), ("TRUE", True), ("no", False), ("0", False)):
+        monkeypatch.setenv("PTSEARCH_DEBUG_TIMINGS", value)
+        assert Settings().debug_timings is expected
+
+
+def test_unset_fields_keep_defaults(monkeypatch):
+    monkeypatch.delenv("PTSEARCH_MAX_RESULTS", raising=False)
+    assert Settings().max_results == Settings.max_results
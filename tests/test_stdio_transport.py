@@ -0,0 +1,124 @@
+"""Tests for the STDIO transport, driven through a subprocess pipe."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.transport import STDIOTransport
+from ptsearch.utils import serialization
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Echoes each call's args back, so responses can be matched to requests
+SERVER = """
+from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.transport import STDIOTransport
+STDIOTransport(MCPProtocolHandler(lambda args: args)).start()
+"""
+
+
+def _start_server() -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.Popen(
+        [sys.executable, "-c", SERVER],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+    )
+
+
+def _call(i: int) -> bytes:
+    return serialization.dumps_bytes({
+        "jsonrpc": "2.0", "id": i, "method": "call_tool",
+        "params": {"tool": "search_pytorch_docs", "args": {"n": i, "text": "é" * (i % 7)}},
+    })
+
+
+def _responses(output: bytes) -> list:
+    assert output.endswith(b"\n")
+    return [serialization.loads(line) for line in output.split(b"\n")[:-1]]
+
+
+def test_split_writes_and_unterminated_last_line():
+    proc = _start_server()
+
+    # The first message arrives in pieces, split inside a multi-byte character
+    first = _call(6)
+    cut = first.index("é".encode()) + 1
+    for piece in (first[:5], first[5:cut], first[cut:] + b"\n"):
+        proc.stdin.write(piece)
+        proc.stdin.flush()
+        time.sleep(0.05)
+
+    # Two messages in one write, then a final one with no trailing newline before EOF
+    proc.stdin.write(_call(1) + b"\n" + _call(2) + b"\n" + _call(3))
+    output, _ = proc.communicate(timeout=30)
+
+    assert proc.returncode == 0
+    assert [r["result"]["result"]["n"] for r in _responses(output)] == [6, 1, 2, 3]
+    assert _responses(output)[0]["result"]["result"]["text"] == "é" * 6
+
+
+def test_many_messages_are_answered_in_order():
+    proc = _start_server()
+    count = 5000
+
+    # Large enough to cross the output flush threshold several times
+    output, _ = proc.communicate(b"".join(_call(i) + b"\n" for i in range(count)), timeout=60)
+
+    responses = _responses(output)
+    assert len(responses) == count
+    assert [r["id"] for r in responses] == list(range(count))
+
+
+def test_invalid_json_gets_an_error_response():
+    proc = _start_server()
+    output, _ = proc.communicate(b"not json\n" + _call(1) + b"\n", timeout=30)
+
+    responses = _responses(output)
+    assert responses[0]["error"]["code"] == -32700
+    assert responses[1]["result"]["result"]["n"] == 1
+
+
+def test_responses_flush_while_input_stays_open():
+    proc = _start_server()
+    try:
+        proc.stdin.write(_call(1) + b"\n")
+        proc.stdin.flush()
+
+        # The response must arrive without closing stdin
+        line = proc.stdout.readline()
+        assert serialization.loads(line)["id"] == 1
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=30)
+    assert proc.returncode == 0
+
+
+def test_stop_from_another_thread_ends_the_loop():
+    read_fd, write_fd = os.pipe()
+    stdin = sys.stdin
+    sys.stdin = os.fdopen(read_fd, "r")
+    try:
+        transports = []
+
+        def run():
+            # Constructed off the main thread, which signal handlers would forbid
+            transport = STDIOTransport(MCPProtocolHandler(lambda args: args))
+            transports.append(transport)
+            transport.start()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not (transports and transports[0].is_running) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        transports[0].stop()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    finally:
+        sys.stdin.close()
+        sys.stdin = stdin
+        os.close(write_fd)
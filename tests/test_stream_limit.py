@@ -0,0 +1,93 @@
+"""Tests for the cap on concurrently open SSE event streams."""
+
+import http.client
+import threading
+import time
+
+import pytest
+
+from ptsearch import server
+from ptsearch.config import settings
+from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.transport import SSETransport
+from ptsearch.transport.wsgi import WSGIServer
+
+
+@pytest.fixture(params=["server", "transport"])
+def app(request, monkeypatch):
+    monkeypatch.setattr(settings, "server_max_streams", 2)
+    if request.param == "server":
+        app = server.create_flask_app()
+        yield app
+        app.extensions["keepalive"].stop()
+    else:
+        transport = SSETransport(MCPProtocolHandler(server.search_handler), port=0)
+        yield transport.flask_app
+        transport._keepalive.stop()
+
+
+def test_streams_past_the_limit_are_rejected(app):
+    client = app.test_client()
+    streams = [client.get("/events", buffered=False) for _ in range(2)]
+    assert [s.status_code for s in streams] == [200, 200]
+
+    rejected = client.get("/events", buffered=False)
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"]
+    assert client.get("/health").status_code == 200
+
+    # Closing a stream frees its slot, even though it was never read; the test
+    # client shares one thread, so streams close in the reverse of opening order
+    streams[1].close()
+    replacement = client.get("/events", buffered=False)
+    assert replacement.status_code == 200
+    replacement.close()
+    streams[0].close()
+
+
+def test_settings_reject_limit_at_or_above_thread_count(monkeypatch):
+    monkeypatch.setattr(settings, "server_max_streams", settings.server_threads)
+    assert "server_max_streams" in settings.validate()
+
+
+def test_calls_are_served_while_streams_are_full(monkeypatch):
+    pytest.importorskip("waitress")
+    monkeypatch.setattr(settings, "server_threads", 3)
+    monkeypatch.setattr(settings, "server_max_streams", 2)
+    app = server.create_flask_app()
+    wsgi = WSGIServer(app, "127.0.0.1", 0)
+    thread = threading.Thread(target=wsgi.serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while wsgi._server is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    port = wsgi._server.effective_port
+
+    connections = []
+    try:
+        # Open more streams than the limit; the extra ones are turned away
+        statuses = []
+        for _ in range(4):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/events")
+            response = conn.getresponse()
+            statuses.append(response.status)
+            if response.status == 200:
+                response.readline()
+                connections.append(conn)
+            else:
+                response.read()
+                conn.close()
+        assert statuses == [200, 200, 503, 503]
+
+        # The worker left over still answers calls
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", "/health")
+        assert conn.getresponse().status == 200
+        conn.close()
+    finally:
+        app.extensions["keepalive"].stop()
+        for conn in connections:
+            conn.close()
+        wsgi.stop()
+        thread.join(timeout=5)